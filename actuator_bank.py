@@ -0,0 +1,197 @@
+"""
+Pin ownership and batched writes for the fan (and any other) outputs.
+
+ActuatorBank sets up the GPIO mode and each output pin once, tracks the
+state every pin was last written with, and applies staged changes for many
+pins in one batched ``GPIO.output(pins, values)`` call per tick. Setting a
+pin to the state it already has, or flipping it back and forth within one
+tick, costs no write at all.
+
+SimulatedGPIO implements the part of the RPi.GPIO API the bank uses and
+records call counts, per-pin writes and (optionally simulated) write time,
+so actuation cost and churn can be tested and benchmarked without a Pi.
+It is also the fallback when RPi.GPIO is not installed.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+
+try:
+    import RPi.GPIO as RPI_GPIO
+except ImportError:
+    RPI_GPIO = None
+
+
+class SimulatedGPIO:
+    """Stand-in for RPi.GPIO that records what would have been written"""
+
+    BCM = "BCM"
+    BOARD = "BOARD"
+    OUT = "OUT"
+    IN = "IN"
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self, call_cost=0.0, pin_cost=0.0, history=1000):
+        # Optional busy-wait per output() call and per pin, to model a slow bus
+        self.call_cost = call_cost
+        self.pin_cost = pin_cost
+        self.mode = None
+        self.pins = {}
+        self.setups = 0
+        self.calls = 0
+        self.writes = 0
+        self.writes_per_pin = Counter()
+        self.write_time = 0.0
+        self.max_call_time = 0.0
+        self.history = deque(maxlen=history)  # (timestamp, pins, seconds) of recent output() calls
+        self._lock = threading.Lock()
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, channel, direction, initial=LOW):
+        for pin in _as_list(channel):
+            self.setups += 1
+            self.pins[pin] = initial
+
+    def output(self, channel, value):
+        start = time.perf_counter()
+        pins = _as_list(channel)
+        values = _as_list(value) if isinstance(value, (list, tuple)) else [value] * len(pins)
+        with self._lock:
+            for pin, level in zip(pins, values):
+                if pin not in self.pins:
+                    raise RuntimeError(f"The GPIO channel has not been set up as an OUTPUT: {pin}")
+                self.pins[pin] = level
+                self.writes_per_pin[pin] += 1
+            cost = self.call_cost + self.pin_cost * len(pins)
+            while time.perf_counter() - start < cost:
+                pass
+            elapsed = time.perf_counter() - start
+            self.calls += 1
+            self.writes += len(pins)
+            self.write_time += elapsed
+            self.max_call_time = max(self.max_call_time, elapsed)
+            self.history.append((time.time(), tuple(pins), elapsed))
+
+    def input(self, channel):
+        return self.pins[channel]
+
+    def cleanup(self, channel=None):
+        for pin in _as_list(channel) if channel is not None else list(self.pins):
+            self.pins.pop(pin, None)
+
+    def stats(self):
+        return {
+            "setups": self.setups,
+            "calls": self.calls,
+            "writes": self.writes,
+            "write_time_ms": self.write_time * 1000,
+            "max_call_ms": self.max_call_time * 1000,
+        }
+
+
+def _as_list(channel):
+    return list(channel) if isinstance(channel, (list, tuple)) else [channel]
+
+
+def get_gpio(backend="auto"):
+    """RPi.GPIO for "rpi", a SimulatedGPIO for "simulated", whichever is available for "auto" """
+    if backend == "simulated" or (backend == "auto" and RPI_GPIO is None):
+        return SimulatedGPIO()
+    if RPI_GPIO is None:
+        raise ImportError("RPi.GPIO is not installed (gpio.backend: rpi)")
+    return RPI_GPIO
+
+
+class ActuatorBank:
+    """Owns the output pins; stages on/off changes and writes them in batches"""
+
+    def __init__(self, gpio=None, interval=0.0, mode="BCM"):
+        self.gpio = gpio if gpio is not None else get_gpio()
+        # interval 0: every set() is written at once; > 0: a thread applies changes each tick;
+        # None: the caller ticks by calling apply()
+        self.interval = interval
+        self.state = {}
+        self.pending = {}
+        self.ticks = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.gpio.setmode(getattr(self.gpio, mode))
+
+    @classmethod
+    def from_config(cls, config):
+        settings = (config or {}).get("gpio") or {}
+        return cls(get_gpio(settings.get("backend", "auto")), settings.get("interval", 0.0))
+
+    def setup(self, pin, on=False):
+        """Configure ``pin`` as an output once; later calls for the same pin are free"""
+        with self._lock:
+            if pin in self.state:
+                return
+            self.gpio.setup(pin, self.gpio.OUT, initial=self.gpio.HIGH if on else self.gpio.LOW)
+            self.state[pin] = on
+        if self.interval and self._thread is None:  # neither 0 nor None
+            self._thread = threading.Thread(target=self._run, name="actuator-bank", daemon=True)
+            self._thread.start()
+
+    def set(self, pin, on):
+        """Stage ``pin`` on/off; the last value staged before the next tick wins"""
+        with self._lock:
+            if pin in self.pending:
+                self.coalesced += 1
+            self.pending[pin] = bool(on)
+        if self.interval == 0:
+            self.apply()
+
+    def get(self, pin):
+        """State the pin will have after the next tick"""
+        with self._lock:
+            return self.pending.get(pin, self.state.get(pin, False))
+
+    def apply(self):
+        """Write every staged change that differs from the pin's state in one call; returns the pins written"""
+        with self._lock:
+            changes = [(pin, on) for pin, on in self.pending.items() if self.state.get(pin) != on]
+            self.coalesced += len(self.pending) - len(changes)
+            self.pending.clear()
+            if changes:
+                pins = [pin for pin, _ in changes]
+                levels = [self.gpio.HIGH if on else self.gpio.LOW for _, on in changes]
+                self.gpio.output(pins if len(pins) > 1 else pins[0], levels if len(levels) > 1 else levels[0])
+                self.state.update(changes)
+            self.ticks += 1
+        return [pin for pin, _ in changes]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.apply()
+
+    def close(self, cleanup=False):
+        """Stop the tick thread after writing what is still staged"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.apply()
+        if cleanup:
+            self.gpio.cleanup()
+
+
+_default_bank = None
+_default_lock = threading.Lock()
+
+
+def default_bank():
+    """Process-wide write-through bank for controllers created without one"""
+    global _default_bank
+    with _default_lock:
+        if _default_bank is None:
+            _default_bank = ActuatorBank()
+        return _default_bank
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Asyncio (ASGI) variant of the Flask dashboard for many concurrent viewers.
+
+Serves the same ``/``, ``/video_feed``, ``/snapshot.jpg``,
+``/api/occupancy*``, ``/healthz`` and ``/readyz`` endpoints plus ``/status``,
+but every viewer is a coroutine instead of a thread, so one process can hold
+hundreds of open MJPEG streams. Frames come from the same StreamHub as
+app_flask.py (one capture + inference + encode per frame). Each connection
+always sends the newest frame once its previous write has drained, so a
+slow client skips frames without delaying the others; a client whose write
+stalls longer than ``send_timeout`` is disconnected.
+
+    python app_asgi.py            # uvicorn on 0.0.0.0:5000
+"""
+
+import asyncio
+import json
+import os
+import time
+from urllib.parse import parse_qs
+
+from occupancy_feed import OccupancyTracker, format_sse
+from stream_hub import LazyStreamHub, SnapshotCache, TierEncoder, create_producer
+from utils import load_config
+
+BOUNDARY = b"frame"
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "index.html")
+
+
+class AsyncBroadcast:
+    """Mirrors the hub's latest frame into the event loop and wakes all waiting viewers at once"""
+
+    def __init__(self):
+        self.loop = None
+        self.version = 0
+        self.frame = None
+        self._event = None
+
+    def attach(self, hub):
+        """Follow ``hub``; frames published before a loop is bound are dropped"""
+        hub.add_listener(self._on_publish)
+        return self
+
+    def bind(self):
+        """Bind to the running loop: at lifespan startup, or on the first wait() without one"""
+        if self.loop is None:
+            self._event = asyncio.Event()
+            self.loop = asyncio.get_running_loop()
+
+    def _on_publish(self, version, frame):
+        # Called on the producer thread
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._update, version, frame)
+        except RuntimeError:
+            pass  # the loop was closed on shutdown
+
+    def _update(self, version, frame):
+        self.version, self.frame = version, frame
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def wait(self, after, timeout=1.0):
+        """(version, frame) newer than ``after``, or None on timeout"""
+        self.bind()
+        if self.version == after:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.version == after or self.frame is None:
+            return None
+        return self.version, self.frame
+
+
+class DashboardApp:
+    """Minimal ASGI application; no framework needed for a handful of routes"""
+
+    def __init__(self, config):
+        self.config = config
+        settings = config.get("asgi") or {}
+        self.send_timeout = settings.get("send_timeout", 10.0)
+        idle_timeout = (config.get("flask") or {}).get("idle_timeout", 30)
+        self.hub = LazyStreamHub(lambda: create_producer(config), idle_timeout)
+        self.tiers = TierEncoder.from_config(config)
+        self.heartbeat = (config.get("flask") or {}).get("occupancy_heartbeat", 5)
+        # Registered before the broadcast, so the state is current when viewers wake up
+        self.occupancy = OccupancyTracker.from_config(config).attach(self.hub)
+        self.snapshots = SnapshotCache.from_config(self.hub, config)
+        self.broadcast = AsyncBroadcast().attach(self.hub)
+        self.viewers = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.started = time.time()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            path = scope["path"]
+            if path == "/":
+                await self.index(send)
+            elif path == "/video_feed":
+                await self.video_feed(scope, receive, send)
+            elif path == "/snapshot.jpg":
+                await self.snapshot(scope, send)
+            elif path == "/api/occupancy":
+                self.hub.touch()
+                state = self.occupancy.current()
+                await self.json(send, dict(state or {}, live=self.hub.running and state is not None))
+            elif path == "/api/occupancy/stream":
+                await self.occupancy_stream(receive, send)
+            elif path == "/api/occupancy/history":
+                query = self.query(scope)
+                await self.json(send, self.occupancy.history(
+                    self.number(query, "since", float), self.number(query, "until", float),
+                    self.number(query, "limit", int)))
+            elif path == "/status":
+                await self.status(send)
+            elif path == "/stream_stats":
+                await self.json(send, dict(self.tiers.snapshot(), **self.snapshots.encoder.snapshot()))
+            elif path == "/healthz":
+                await self.json(send, self.hub.status())
+            elif path == "/readyz":
+                status = self.hub.status()
+                await self.json(send, status, 200 if status["ready"] else 503)
+            else:
+                await self.respond(send, 404, b"Not found", b"text/plain")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # The camera and model are opened on the hub's thread for the first viewer
+                self.broadcast.bind()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, self.hub.stop)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def respond(self, send, status, body, content_type):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", content_type),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def index(self, send):
+        with open(TEMPLATE, "rb") as f:
+            await self.respond(send, 200, f.read(), b"text/html; charset=utf-8")
+
+    async def json(self, send, data, status=200):
+        await self.respond(send, status, json.dumps(data).encode(), b"application/json")
+
+    async def status(self, send):
+        await self.json(send, dict(self.hub.status(), **{
+            "connections": self.viewers,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "uptime_s": time.time() - self.started,
+            "tiers": self.tiers.snapshot(),
+        }))
+
+    @staticmethod
+    def query(scope):
+        return {key: values[-1] for key, values in parse_qs(scope["query_string"].decode()).items()}
+
+    @staticmethod
+    def number(query, key, kind):
+        try:
+            return kind(query[key])
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def watch_disconnect(receive):
+        """Event set once the client goes away, and the task watching for it"""
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+        return disconnected, asyncio.create_task(watch())
+
+    def select_tier(self, scope):
+        query = self.query(scope)
+        return self.tiers.select(query.get("tier"), self.number(query, "width", int),
+                                 self.number(query, "quality", int), self.number(query, "fps", float))
+
+    async def video_feed(self, scope, receive, send):
+        try:
+            tier = self.select_tier(scope)
+        except ValueError as e:
+            await self.respond(send, 400, str(e).encode(), b"text/plain")
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"multipart/x-mixed-replace; boundary=" + BOUNDARY),
+            (b"cache-control", b"no-cache"),
+        ]})
+
+        disconnected, watcher = self.watch_disconnect(receive)
+        self.viewers += 1
+        self.hub.join()
+        self.tiers.add_viewer(tier)
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / tier.fps if tier.fps else 0.0
+        next_due = 0.0
+        version = 0
+        try:
+            while not disconnected.is_set():
+                item = await self.broadcast.wait(version)
+                if item is None:
+                    if not self.hub.keep_waiting():
+                        break
+                    continue
+                version, frame = item
+                if interval:
+                    now = time.monotonic()
+                    if now < next_due:
+                        continue
+                    next_due = max(next_due + interval, now)
+                jpeg = frame.encoded.get(tier.name) if tier.reencode else frame.jpeg
+                if jpeg is None:
+                    # First viewer of this tier encodes it off the loop; the rest reuse the bytes
+                    jpeg = await loop.run_in_executor(None, self.tiers.encode, frame, tier)
+                chunk = (b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                         b"X-Frame-Time: " + f"{frame.timestamp:.6f}".encode() + b"\r\n\r\n"
+                         + jpeg + b"\r\n")
+                # send() only returns once the server has flushed the previous write, which is
+                # the per-connection backpressure; whatever was published meanwhile is skipped
+                await asyncio.wait_for(
+                    send({"type": "http.response.body", "body": chunk, "more_body": True}),
+                    self.send_timeout)
+                self.frames_sent += 1
+                self.bytes_sent += len(chunk)
+                self.tiers.record(tier, len(jpeg))
+        except (asyncio.TimeoutError, OSError):
+            pass
+        finally:
+            self.viewers -= 1
+            self.hub.leave()
+            self.tiers.add_viewer(tier, -1)
+            watcher.cancel()
+
+    async def snapshot(self, scope, send):
+        """Newest already-encoded frame, 304 when the client's ETag is still current"""
+        thumbnail = self.query(scope).get("thumbnail") == "1"
+        latest = self.snapshots.latest(thumbnail)
+        if latest is None:
+            await send({"type": "http.response.start", "status": 503,
+                        "headers": [(b"retry-after", b"1"), (b"content-length", b"0")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        etag, frame = latest
+        headers = [(b"etag", f'"{etag}"'.encode()),
+                   (b"cache-control", b"no-cache"),
+                   (b"x-frame-time", f"{frame.timestamp:.3f}".encode())]
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode()
+        if f'"{etag}"' in if_none_match or if_none_match.strip() == "*":
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if thumbnail and "thumbnail" not in frame.encoded:
+            # Resizing is the only real work here; keep it off the loop
+            jpeg = await asyncio.get_running_loop().run_in_executor(None, self.snapshots.jpeg, frame, True)
+        else:
+            jpeg = self.snapshots.jpeg(frame, thumbnail)
+        await send({"type": "http.response.start", "status": 200, "headers": headers + [
+            (b"content-type", b"image/jpeg"), (b"content-length", str(len(jpeg)).encode())]})
+        await send({"type": "http.response.body", "body": jpeg})
+
+    async def occupancy_stream(self, receive, send):
+        """Server-Sent Events: each occupancy change, plus a heartbeat when nothing changes"""
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")]})
+        disconnected, watcher = self.watch_disconnect(receive)
+        self.hub.join()
+        version = self.occupancy.version
+        frame_version = 0
+        last_sent = time.monotonic()
+        try:
+            current = self.occupancy.current()
+            if current is not None:
+                await self.send_event(send, "occupancy", current)
+            while not disconnected.is_set():
+                item = await self.broadcast.wait(frame_version)
+                if item is not None:
+                    frame_version = item[0]
+                elif not self.hub.keep_waiting():
+                    break
+                if self.occupancy.version != version:
+                    version = self.occupancy.version
+                    await self.send_event(send, "occupancy", self.occupancy.current())
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= self.heartbeat:
+                    await self.send_event(send, "heartbeat", self.occupancy.current() or {"ts": time.time()})
+                    last_sent = time.monotonic()
+        except (asyncio.TimeoutError, OSError):
+            pass
+        finally:
+            self.hub.leave()
+            watcher.cancel()
+
+    async def send_event(self, send, event, data):
+        await asyncio.wait_for(send({"type": "http.response.body", "body": format_sse(event, data).encode(),
+                                     "more_body": True}), self.send_timeout)
+
+
+app = DashboardApp(load_config("config.yaml") or {})
+
+if __name__ == "__main__":
+    import uvicorn
+
+    settings = app.config.get("asgi") or {}
+    uvicorn.run(app, host=settings.get("host", "0.0.0.0"), port=settings.get("port", 5000),
+                log_level="warning")
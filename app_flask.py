@@ -1,22 +1,26 @@
+from flask import Flask, render_template, Response, jsonify, request
 
-from flask import Flask, render_template, Response
-import cv2
-import torch
+from occupancy_feed import OccupancyTracker
+from stream_hub import LazyStreamHub, SnapshotCache, TierEncoder, create_producer
+from utils import load_config
 
 app = Flask(__name__)
-camera = cv2.VideoCapture(0)
-model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-
-def gen_frames():
-    while True:
-        success, frame = camera.read()
-        if not success:
-            break
-        else:
-            results = model(frame)
-            _, buffer = cv2.imencode('.jpg', results.render()[0])
-            frame = buffer.tobytes()
-            yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+config = load_config("config.yaml") or {}
+
+# One producer captures, detects and encodes each frame once for every viewer.
+# Camera and model are only opened while someone watches /video_feed.
+hub = LazyStreamHub(lambda: create_producer(config),
+                    idle_timeout=(config.get("flask") or {}).get("idle_timeout", 30))
+# Each quality tier is encoded once per frame and shared by all its viewers
+tiers = TierEncoder.from_config(config)
+# Occupancy API reuses the detections of the same pass
+occupancy = OccupancyTracker.from_config(config).attach(hub)
+# Polling clients get the last frame the stream produced, never a fresh capture
+snapshots = SnapshotCache.from_config(hub, config)
+
+def gen_frames(tier):
+    for jpeg in tiers.stream(hub, tier):
+        yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
 
 @app.route('/')
 def index():
@@ -24,7 +28,61 @@ def index():
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(gen_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    # /video_feed?tier=low or ?width=640&quality=70&fps=10 (mapped to the closest tier)
+    try:
+        tier = tiers.select(request.args.get('tier'), request.args.get('width', type=int),
+                            request.args.get('quality', type=int), request.args.get('fps', type=float))
+    except ValueError as e:
+        return str(e), 400
+    return Response(gen_frames(tier), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/stream_stats')
+def stream_stats():
+    return jsonify(dict(tiers.snapshot(), **snapshots.encoder.snapshot()))
+
+@app.route('/snapshot.jpg')
+def snapshot():
+    thumbnail = request.args.get('thumbnail', default=0, type=int) == 1
+    latest = snapshots.latest(thumbnail)
+    if latest is None:
+        return 'No frame yet', 503, {'Retry-After': '1'}
+    etag, frame = latest
+    headers = {'Cache-Control': 'no-cache', 'X-Frame-Time': f'{frame.timestamp:.3f}'}
+    # Answer revalidations before touching the encoder
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(snapshots.jpeg(frame, thumbnail), mimetype='image/jpeg', headers=headers)
+    # No Last-Modified: its one-second resolution would let If-Modified-Since hide newer frames
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/occupancy')
+def api_occupancy():
+    hub.touch()
+    state = occupancy.current()
+    return jsonify(dict(state or {}, live=hub.running and state is not None))
+
+@app.route('/api/occupancy/stream')
+def api_occupancy_stream():
+    heartbeat = (config.get("flask") or {}).get("occupancy_heartbeat", 5)
+    return Response(occupancy.events(hub, heartbeat), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/occupancy/history')
+def api_occupancy_history():
+    changes = occupancy.history(request.args.get('since', type=float), request.args.get('until', type=float),
+                                request.args.get('limit', type=int))
+    return jsonify(changes)
+
+@app.route('/healthz')
+def healthz():
+    return jsonify(hub.status())
+
+@app.route('/readyz')
+def readyz():
+    status = hub.status()
+    return jsonify(status), 200 if status["ready"] else 503
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,304 @@
+"""
+CPU inference backends behind one detection call.
+
+Every backend takes BGR frames as delivered by OpenCV and returns
+``Detections`` (see detections.py), so the rest of the app does not care
+which runtime produced them:
+
+- ``torch``: eager YOLOv5 from the model registry (AutoShape pre/post-processing)
+- ``torchscript``: traced network, our own letterbox + NMS
+- ``onnx``: ONNX Runtime on the exported network
+- ``onnx-int8``: ONNX Runtime on a dynamically int8-quantized export
+- ``stub``: no model; synthetic detections at a fixed latency, for benchmarks and tests
+
+Exported models live next to the cached weights and are produced with
+``python export_backends.py``. The backend is chosen with
+``inference.backend`` in config.yaml.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from detections import PERSON, Detections, configure_model
+
+BACKENDS = ("torch", "torchscript", "onnx", "onnx-int8", "stub")
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def inference_settings(config=None):
+    from model_registry import model_settings
+
+    settings = (config or {}).get("inference") or {}
+    detection = (config or {}).get("detection") or {}
+    model = model_settings(config)
+    return {
+        "backend": settings.get("backend", "torch"),
+        "img_size": settings.get("img_size", 640),
+        "threads": settings.get("threads", 0),
+        "classes": detection.get("classes", [PERSON]),
+        "confidence": detection.get("confidence", 0.25),
+        "iou": detection.get("iou", 0.45),
+        "name": model["name"],
+        "cache_dir": model["cache_dir"],
+    }
+
+
+def export_paths(name, cache_dir):
+    """Where each exported backend is stored"""
+    return {
+        "torchscript": os.path.join(cache_dir, f"{name}.torchscript"),
+        "onnx": os.path.join(cache_dir, f"{name}.onnx"),
+        "onnx-int8": os.path.join(cache_dir, f"{name}-int8.onnx"),
+    }
+
+
+def letterbox(frame, size, color=114):
+    """Resize keeping aspect ratio and pad to ``size x size``; returns (image, scale, (pad_x, pad_y))"""
+    import cv2
+
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    if (new_w, new_h) != (width, height):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    padded = np.full((size, size, 3), color, dtype=np.uint8)
+    padded[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = frame
+    return padded, scale, (pad_x, pad_y)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression; returns kept indices, best score first"""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def postprocess(prediction, conf_threshold=0.25, iou_threshold=0.45, classes=None, max_det=300):
+    """Raw YOLOv5 output (``N x (5 + classes)``, xywh in input pixels) to an ``M x 6`` xyxy array"""
+    prediction = prediction[prediction[:, 4] > conf_threshold]
+    if not len(prediction):
+        return np.empty((0, 6), dtype=np.float32)
+
+    scores = prediction[:, 5:] * prediction[:, 4:5]
+    class_ids = scores.argmax(1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+    mask = confidences > conf_threshold
+    if classes is not None:
+        mask &= np.isin(class_ids, list(classes))
+    prediction, class_ids, confidences = prediction[mask], class_ids[mask], confidences[mask]
+    if not len(prediction):
+        return np.empty((0, 6), dtype=np.float32)
+
+    xy, wh = prediction[:, :2], prediction[:, 2:4]
+    boxes = np.hstack([xy - wh / 2, xy + wh / 2])
+    # Offset boxes per class so NMS never suppresses across classes
+    keep = nms(boxes + class_ids[:, None] * 4096.0, confidences, iou_threshold)[:max_det]
+    return np.hstack([boxes[keep], confidences[keep, None], class_ids[keep, None]]).astype(np.float32)
+
+
+class DetectorBackend:
+    """Base class: ``detect(frame)`` / ``detect_batch(frames)`` returning Detections"""
+
+    name = "base"
+    startup = ""
+
+    def detect(self, frame, size=None):
+        return self.detect_batch([frame], size)[0]
+
+    def __call__(self, frame):
+        return self.detect(frame)
+
+    def detect_batch(self, frames, size=None):
+        """Detect on each frame; ``size`` overrides the network input size"""
+        raise NotImplementedError
+
+    def warm_up(self, size=640):
+        self.detect(np.zeros((size, size, 3), dtype=np.uint8))
+
+
+class TorchBackend(DetectorBackend):
+    """Eager PyTorch YOLOv5 through AutoShape"""
+
+    name = "torch"
+
+    def __init__(self, model, config=None, img_size=640):
+        self.model = configure_model(model, config)
+        self.img_size = img_size
+
+    def detect_batch(self, frames, size=None):
+        return Detections.from_batch(self.model(list(frames), size=size or self.img_size))
+
+
+class ExportedBackend(DetectorBackend):
+    """Shared letterbox / NMS for backends that run the bare network"""
+
+    def __init__(self, img_size=640, conf=0.25, iou=0.45, classes=(PERSON,)):
+        self.img_size = img_size
+        self.conf = conf
+        self.iou = iou
+        self.classes = classes
+
+    def forward(self, batch):
+        """Run the network on a float32 ``B x 3 x S x S`` batch; returns ``B x N x 85``"""
+        raise NotImplementedError
+
+    def detect_batch(self, frames, size=None):
+        images, transforms = [], []
+        for frame in frames:
+            # Same channel order the eager AutoShape path receives
+            image, scale, pad = letterbox(frame, size or self.img_size)
+            images.append(image)
+            transforms.append((scale, pad, frame.shape[:2]))
+        batch = np.ascontiguousarray(np.stack(images).transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+        results = []
+        for prediction, (scale, (pad_x, pad_y), (height, width)) in zip(self.forward(batch), transforms):
+            data = postprocess(prediction, self.conf, self.iou, self.classes)
+            data[:, [0, 2]] = ((data[:, [0, 2]] - pad_x) / scale).clip(0, width)
+            data[:, [1, 3]] = ((data[:, [1, 3]] - pad_y) / scale).clip(0, height)
+            results.append(Detections(data))
+        return results
+
+
+class TorchScriptBackend(ExportedBackend):
+    name = "torchscript"
+
+    def __init__(self, path, threads=0, **kwargs):
+        import torch
+
+        super().__init__(**kwargs)
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.module = torch.jit.load(path, map_location="cpu").eval()
+
+    def forward(self, batch):
+        with self.torch.inference_mode():
+            return self.module(self.torch.from_numpy(batch)).numpy()
+
+
+class OnnxBackend(ExportedBackend):
+    name = "onnx"
+
+    def __init__(self, path, threads=0, **kwargs):
+        import onnxruntime as ort
+
+        super().__init__(**kwargs)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def forward(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class StubBackend(DetectorBackend):
+    """Model-free backend: a person appears for ``period`` frames, then is absent for ``period`` frames"""
+
+    name = "stub"
+
+    def __init__(self, latency=0.02, period=30, confidence=0.8):
+        self.latency = latency
+        self.period = period
+        self.confidence = confidence
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    def detect_batch(self, frames, size=None):
+        if self.latency:
+            # Busy-wait so the stub costs CPU like a real forward pass would
+            deadline = time.perf_counter() + self.latency * len(frames)
+            while time.perf_counter() < deadline:
+                pass
+        results = []
+        for frame in frames:
+            with self._lock:
+                present = self.period and (self.frames // self.period) % 2 == 0
+                self.frames += 1
+            if present:
+                height, width = frame.shape[:2]
+                box = [width * 0.3, height * 0.2, width * 0.6, height * 0.9, self.confidence, PERSON]
+                results.append(Detections([box]))
+            else:
+                results.append(Detections())
+        return results
+
+
+def create_backend(config=None, backend=None):
+    """Build the backend named in config.yaml (or ``backend``), without caching"""
+    settings = inference_settings(config)
+    backend = backend or settings["backend"]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (choose from {', '.join(BACKENDS)})")
+
+    if backend == "torch":
+        from model_registry import get_model
+        return TorchBackend(get_model(config), config, settings["img_size"])
+    if backend == "stub":
+        stub = ((config or {}).get("inference") or {}).get("stub") or {}
+        return StubBackend(stub.get("latency_ms", 20) / 1000.0, stub.get("period", 30))
+
+    path = export_paths(settings["name"], settings["cache_dir"])[backend]
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"{path} not found. Run: python export_backends.py")
+    kwargs = dict(img_size=settings["img_size"], conf=settings["confidence"],
+                  iou=settings["iou"], classes=settings["classes"], threads=settings["threads"])
+    if backend == "torchscript":
+        return TorchScriptBackend(path, **kwargs)
+    instance = OnnxBackend(path, **kwargs)
+    instance.name = backend
+    return instance
+
+
+def get_backend(config=None):
+    """The shared, warmed-up backend for this process"""
+    settings = inference_settings(config)
+    key = (settings["backend"], settings["name"], os.path.abspath(settings["cache_dir"]))
+    with _lock:
+        if key not in _backends:
+            started = time.perf_counter()
+            instance = create_backend(config)
+            if settings["backend"] == "stub":
+                instance.startup = "stub backend (no model)"
+            elif settings["backend"] == "torch":
+                # The registry already loaded and warmed up the eager model
+                from model_registry import format_startup
+                instance.startup = format_startup(config)
+            else:
+                loaded = time.perf_counter()
+                instance.warm_up(settings["img_size"])
+                warmed = time.perf_counter()
+                instance.startup = (f"{settings['name']} ({instance.name}) ready in {warmed - started:.2f}s "
+                                    f"(load {loaded - started:.2f}s, warm-up {warmed - loaded:.2f}s)")
+            _backends[key] = instance
+        return _backends[key]
+
+
+def release_backend(config=None):
+    """Drop the shared backend (and for torch the registry's model) so its memory can be reclaimed"""
+    settings = inference_settings(config)
+    key = (settings["backend"], settings["name"], os.path.abspath(settings["cache_dir"]))
+    with _lock:
+        _backends.pop(key, None)
+    if settings["backend"] == "torch":
+        from model_registry import release_model
+        release_model(config)
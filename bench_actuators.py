@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: fan pin writes, one GPIO.output() per transition (the old
+FanController) vs. ActuatorBank writing through or batching per tick.
+
+Runs on SimulatedGPIO. Each tick every pin gets several on/off requests
+(detection frames arriving between ticks) that flicker with probability
+``--churn``; ``--call-us`` and ``--pin-us`` model what one output() call and
+each pin in it cost on the real bus.
+
+    python bench_actuators.py --pins 200 --ticks 500 --frames 5
+"""
+
+import argparse
+import random
+import time
+
+from actuator_bank import ActuatorBank, SimulatedGPIO
+
+
+def requests(pins, ticks, frames, churn, seed=1):
+    """Per tick, the (pin, on) requests made by the detection loops"""
+    rng = random.Random(seed)
+    occupied = [False] * pins
+    for _ in range(ticks):
+        tick = []
+        for pin in range(pins):
+            if rng.random() < 0.02:
+                occupied[pin] = not occupied[pin]
+            for _ in range(frames):
+                # A missed or spurious detection flips the request for one frame
+                tick.append((pin, occupied[pin] != (rng.random() < churn)))
+        yield tick
+
+
+def per_transition(gpio, workload, pins):
+    """The old FanController: write the pin whenever its state changes"""
+    gpio.setmode(gpio.BCM)
+    state = [False] * pins
+    for pin in range(pins):
+        gpio.setup(pin, gpio.OUT)
+    for tick in workload:
+        for pin, on in tick:
+            if state[pin] != on:
+                gpio.output(pin, gpio.HIGH if on else gpio.LOW)
+                state[pin] = on
+
+
+def banked(gpio, workload, pins, interval):
+    bank = ActuatorBank(gpio, interval=interval)
+    for pin in range(pins):
+        bank.setup(pin)
+    for tick in workload:
+        for pin, on in tick:
+            bank.set(pin, on)
+        if interval is None:
+            bank.apply()
+    bank.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pins", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=5, help="requests per pin between ticks")
+    parser.add_argument("--churn", type=float, default=0.05, help="chance a request flickers")
+    parser.add_argument("--call-us", type=float, default=20.0, help="simulated cost of one output() call")
+    parser.add_argument("--pin-us", type=float, default=2.0, help="simulated cost per pin written")
+    args = parser.parse_args()
+
+    workload = list(requests(args.pins, args.ticks, args.frames, args.churn))
+    modes = {
+        "per transition (old)": lambda gpio: per_transition(gpio, workload, args.pins),
+        "bank, write-through": lambda gpio: banked(gpio, workload, args.pins, 0),
+        "bank, per tick": lambda gpio: banked(gpio, workload, args.pins, None),
+    }
+    print(f"{sum(len(tick) for tick in workload):,} requests for {args.pins} pins over {args.ticks} ticks")
+    print(f"{'mode':<22} {'calls':>8} {'pin writes':>11} {'write ms':>10} {'max call ms':>12} {'wall s':>8}")
+    for name, run in modes.items():
+        gpio = SimulatedGPIO(call_cost=args.call_us / 1e6, pin_cost=args.pin_us / 1e6)
+        start = time.perf_counter()
+        run(gpio)
+        wall = time.perf_counter() - start
+        stats = gpio.stats()
+        print(f"{name:<22} {stats['calls']:>8,} {stats['writes']:>11,} {stats['write_time_ms']:>10.1f} "
+              f"{stats['max_call_ms']:>12.3f} {wall:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
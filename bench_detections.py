@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: person check via pandas DataFrame + iterrows() (the old
+main.py path) vs. the vectorized Detections API.
+
+The pandas path is reproduced the way YOLOv5's ``results.pandas()`` builds
+its frame (columns plus a ``name`` column mapped from class ids), so no
+model or weights are needed.
+
+    python bench_detections.py --detections 20 --iterations 2000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from detections import COCO_NAMES, Detections
+
+
+def make_detections(n, seed=0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 600, size=(n, 2))
+    wh = rng.uniform(10, 200, size=(n, 2))
+    conf = rng.uniform(0.25, 1.0, size=(n, 1))
+    cls = rng.integers(0, 80, size=(n, 1))
+    return np.hstack([xy, xy + wh, conf, cls]).astype(np.float32)
+
+
+def pandas_path(data):
+    import pandas as pd
+    df = pd.DataFrame(data, columns=["xmin", "ymin", "xmax", "ymax", "confidence", "class"])
+    df["class"] = df["class"].astype(int)
+    df["name"] = [COCO_NAMES[c] for c in df["class"]]
+    return any(d['name'] == 'person' for _, d in df.iterrows())
+
+
+def vectorized_path(data):
+    detections = Detections(data, COCO_NAMES)
+    return detections.has_person(), detections.person_count(), detections.max_confidence()
+
+
+def timeit(fn, data, iterations):
+    fn(data)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(data)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--detections", type=int, nargs="+", default=[0, 5, 20, 100])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'detections':>10} {'pandas (us)':>12} {'vectorized (us)':>16} {'speedup':>8}")
+    for n in args.detections:
+        data = make_detections(n)
+        assert pandas_path(data) == vectorized_path(data)[0]
+        slow = timeit(pandas_path, data, args.iterations)
+        fast = timeit(vectorized_path, data, args.iterations)
+        print(f"{n:>10} {slow * 1e6:>12.1f} {fast * 1e6:>16.1f} {slow / fast:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
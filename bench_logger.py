@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: DetectionLogger with one open/append/close per event (the
+old behaviour) vs. the queued background writer.
+
+Reports the cost of a log_event() call as seen by the detection loop and
+the total time until every event is on disk, with and without the stdout
+echo (sent to /dev/null so terminal speed doesn't dominate).
+
+    python bench_logger.py --events 20000
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+from main import DetectionLogger
+
+
+def run(events, **options):
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        path = os.path.join(tmp, "detection_log.txt")
+        with contextlib.redirect_stdout(devnull):
+            logger = DetectionLogger(path, **options)
+            start = time.perf_counter()
+            for i in range(events):
+                logger.log_event("IDLE", f"No human detected ({i})", "OFF")
+            queued = time.perf_counter() - start
+            logger.close()
+            total = time.perf_counter() - start
+        with open(path, encoding="utf-8") as f:
+            written = sum(1 for line in f if line.startswith("["))
+    assert written == events, f"{written} of {events} events written"
+    return queued, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    modes = {
+        "sync, echo (old)": {"async_write": False, "echo": True},
+        "sync, no echo": {"async_write": False, "echo": False},
+        "async, echo": {"async_write": True, "echo": True},
+        "async, no echo": {"async_write": True, "echo": False},
+    }
+    print(f"{'mode':<18} {'us/call':>9} {'events/s':>12} {'until on disk (s)':>18}")
+    baseline = None
+    for name, options in modes.items():
+        queued, total = run(args.events, **options)
+        baseline = baseline or queued
+        print(f"{name:<18} {queued / args.events * 1e6:>9.2f} {args.events / total:>12,.0f} {total:>18.3f}"
+              f"   ({baseline / queued:.0f}x per call)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-frame overlay rendering.
+
+Compares the old display path (a fresh annotated copy per draw, done twice
+per frame in Combined mode the way ``results.render()[0]`` was called for
+the banner and again for ``imshow``) with OverlayRenderer drawing into its
+reused buffer or in place. Reports time per frame and the extra memory each
+frame needs (tracemalloc peak above the steady state).
+
+    python bench_overlay.py --detections 5 --iterations 500
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from bench_detections import make_detections
+from detections import COCO_NAMES, Detections
+from overlay import OverlayRenderer, temperature_banner
+
+BANNER = temperature_banner(28.4, 27)
+
+
+def draw_copy(frame, detections, color=(0, 255, 0)):
+    """The previous renderer: annotate a copy of the frame"""
+    annotated = frame.copy()
+    for x1, y1, x2, y2, conf, cls in detections.data:
+        label = f"{detections.names.get(int(cls), int(cls))} {conf:.2f}"
+        cv2.rectangle(annotated, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+        cv2.putText(annotated, label, (int(x1), max(int(y1) - 5, 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+    return annotated
+
+
+def render_twice(frame, detections):
+    cv2.putText(draw_copy(frame, detections), BANNER, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    return draw_copy(frame, detections)
+
+
+def render_copy(frame, detections):
+    annotated = draw_copy(frame, detections)
+    cv2.putText(annotated, BANNER, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    return annotated
+
+
+def measure(fn, frame, detections, iterations):
+    fn(frame, detections)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(frame, detections)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    fn(frame, detections)
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    fn(frame, detections)
+    extra = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return elapsed, extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="1280x720", help="frame WxH")
+    parser.add_argument("--detections", type=int, nargs="+", default=[0, 5, 20])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    frame = np.full((height, width, 3), 40, dtype=np.uint8)
+    renderer = OverlayRenderer()
+    paths = {
+        "render() x2 (old combined)": render_twice,
+        "copy + draw (old)": render_copy,
+        "OverlayRenderer buffer": lambda f, d: renderer.render(f, d, BANNER),
+        "OverlayRenderer in place": lambda f, d: renderer.render(f, d, BANNER, in_place=True),
+    }
+
+    print(f"{'detections':>10}  {'path':<28} {'ms/frame':>9} {'extra KB/frame':>15}")
+    for n in args.detections:
+        detections = Detections(make_detections(n), COCO_NAMES)
+        for name, fn in paths.items():
+            elapsed, extra = measure(fn, frame, detections, args.iterations)
+            print(f"{n:>10}  {name:<28} {elapsed * 1e3:>9.3f} {extra / 1024:>15.1f}")
+    print(f"\nOverlayRenderer buffer allocations: {renderer.allocations}")
+
+
+if __name__ == "__main__":
+    main()
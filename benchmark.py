@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark for the detection loops.
+
+Runs the same per-frame logic as ``run_human_detection`` /
+``run_combined_mode`` in main.py - capture, detection (with the motion gate,
+governor and pipeline settings from config.yaml), fan decision + logging and
+rendering - headlessly against a video file or synthetic frames, and writes
+per-stage latency percentiles as JSON so runs can be compared. The fan pin
+is driven through a SimulatedGPIO, whose write counts are reported too.
+
+    python benchmark.py --backend stub --frames 500 --output before.json
+    python benchmark.py --backend stub --frames 500 --compare before.json
+    python benchmark.py --source clip.mp4 --backend onnx --mode combined
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+STAGES = ("capture", "inference", "decision", "render")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, math.ceil(pct / 100.0 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(samples):
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": 1000.0 * sum(values) / len(values),
+        "p50_ms": 1000.0 * percentile(values, 50),
+        "p95_ms": 1000.0 * percentile(values, 95),
+        "p99_ms": 1000.0 * percentile(values, 99),
+        "max_ms": 1000.0 * values[-1],
+    }
+
+
+class TimedSource:
+    """Frame source wrapper recording capture latency"""
+
+    def __init__(self, source, samples, max_frames):
+        self.source = source
+        self.samples = samples
+        self.max_frames = max_frames
+        self.count = 0
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def read(self):
+        if self.max_frames and self.count >= self.max_frames:
+            return False, None
+        start = time.perf_counter()
+        ret, frame = self.source.read()
+        self.samples.append(time.perf_counter() - start)
+        self.count += ret
+        return ret, frame
+
+    def release(self):
+        self.source.release()
+
+
+class TimedDetector:
+    """Detector wrapper recording the latency of real inference calls"""
+
+    def __init__(self, detector, samples):
+        self.detector = detector
+        self.samples = samples
+
+    def __call__(self, frame):
+        start = time.perf_counter()
+        result = self.detector(frame)
+        self.samples.append(time.perf_counter() - start)
+        return result
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def run(config, mode="human", source="synthetic", frames=300, trace_memory=False, log_file=None):
+    """Run one benchmark and return the report dict"""
+    from actuator_bank import ActuatorBank, SimulatedGPIO
+    from camera import open_source
+    from fan_controller import FanController
+    from overlay import OverlayRenderer
+    from temp_sensor import TemperatureSensor
+    import main
+
+    samples = {stage: [] for stage in STAGES}
+    log_file = log_file or os.path.join(tempfile.mkdtemp(prefix="bench-"), "detection_log.txt")
+
+    # Console output from the loop is part of the work, but not of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        logger = main.DetectionLogger.from_config(config, log_file)
+        detector = TimedDetector(main.build_detector(config, logger), samples["inference"])
+        camera = TimedSource(open_source(source), samples["capture"], frames)
+        gpio = SimulatedGPIO()
+        bank = ActuatorBank(gpio)
+        fan = FanController(config.get("gpio_pin", 17), config.get("off_delay", 15), bank)
+        temp_sensor = TemperatureSensor(config.get("temp_threshold", 27))
+        renderer = OverlayRenderer()
+
+        if trace_memory:
+            tracemalloc.start()
+        detection_count = 0
+        processed = 0
+        started = time.perf_counter()
+        for frame, detections in main.detection_frames(camera, detector, config, logger):
+            t0 = time.perf_counter()
+            if mode == "combined":
+                current_temp = temp_sensor.read_temp()
+                detection_count = main.handle_combined_frame(
+                    detections, current_temp, fan, config, logger, detection_count)
+                t1 = time.perf_counter()
+                main.render_combined_frame(frame, detections, current_temp, config.get("temp_threshold", 27),
+                                           renderer)
+            else:
+                detection_count = main.handle_human_frame(detections, fan, logger, detection_count)
+                t1 = time.perf_counter()
+                main.render_human_frame(frame, detections, renderer)
+            t2 = time.perf_counter()
+            samples["decision"].append(t1 - t0)
+            samples["render"].append(t2 - t1)
+            processed += 1
+        elapsed = time.perf_counter() - started
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        camera.release()
+        bank.close()
+        logger.close()
+
+    return {
+        "mode": mode,
+        "source": str(source),
+        "backend": detector.detector.name,
+        "frames": processed,
+        "inferences": len(samples["inference"]),
+        "detections": detection_count,
+        "elapsed_s": elapsed,
+        "fps": processed / elapsed if elapsed > 0 else 0.0,
+        "stages": {stage: summarize(values) for stage, values in samples.items()},
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_traced_mb": traced_peak / (1024.0 * 1024.0) if traced_peak is not None else None,
+        "gpio": gpio.stats(),
+        "settings": {
+            "pipeline": bool((config.get("pipeline") or {}).get("enabled")),
+            "motion_gate": bool((config.get("motion_gate") or {}).get("enabled")),
+            "governor": bool((config.get("governor") or {}).get("enabled")),
+        },
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+def compare(report, baseline):
+    """Print the change of each headline number against an earlier report"""
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\n{'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}")
+    print(f"{'fps':<22} {baseline['fps']:>10.1f} {report['fps']:>10.1f} {delta(report['fps'], baseline['fps']):>8}")
+    for stage in STAGES:
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            old = baseline["stages"].get(stage, {}).get(key)
+            new = report["stages"].get(stage, {}).get(key)
+            if old is None or new is None:
+                continue
+            print(f"{stage + ' ' + key:<22} {old:>10.2f} {new:>10.2f} {delta(new, old):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless replay benchmark of the detection loop")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--mode", choices=("human", "combined"), default="human")
+    parser.add_argument("--source", default="synthetic:640x480@0",
+                        help="video file, camera index or synthetic[:WxH@FPS] (fps 0 = unpaced)")
+    parser.add_argument("--frames", type=int, default=300, help="frames to process (0 = whole source)")
+    parser.add_argument("--backend", help="override inference.backend, e.g. stub")
+    parser.add_argument("--stub-latency-ms", type=float, help="simulated inference time for the stub backend")
+    parser.add_argument("--pipeline", choices=("on", "off"))
+    parser.add_argument("--motion-gate", choices=("on", "off"))
+    parser.add_argument("--governor", choices=("on", "off"))
+    parser.add_argument("--trace-memory", action="store_true", help="also report tracemalloc peak (slower)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args()
+
+    from utils import load_config
+    config = copy.deepcopy(load_config(args.config) or {})
+    if args.backend:
+        config.setdefault("inference", {})["backend"] = args.backend
+    if args.stub_latency_ms is not None:
+        config.setdefault("inference", {}).setdefault("stub", {})["latency_ms"] = args.stub_latency_ms
+    for option, section in ((args.pipeline, "pipeline"), (args.motion_gate, "motion_gate"),
+                            (args.governor, "governor")):
+        if option:
+            config.setdefault(section, {})["enabled"] = option == "on"
+
+    report = run(config, args.mode, args.source, args.frames, args.trace_memory)
+    text = json.dumps(report, indent=2)
+    print(text)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Frame sources for the detection loops.
+
+A source is anything with the ``cv2.VideoCapture`` interface
+(``isOpened()``, ``read()``, ``release()``), so the loops in main.py can run
+against a webcam, a recorded video file / stream URL or generated frames.
+"""
+
+import time
+
+import numpy as np
+
+
+class SyntheticSource:
+    """Generates frames with a moving block, for running without a camera"""
+
+    def __init__(self, width=640, height=480, fps=30, max_frames=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.max_frames = max_frames
+        self.frame_index = 0
+        self._opened = True
+        self._next_time = time.perf_counter()
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        if self.max_frames is not None and self.frame_index >= self.max_frames:
+            return False, None
+
+        # Pace like a real camera so downstream stages see realistic timing
+        if self.fps:
+            delay = self._next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time, time.perf_counter()) + 1.0 / self.fps
+
+        frame = np.full((self.height, self.width, 3), 40, dtype=np.uint8)
+        size = max(self.height // 4, 1)
+        x = (self.frame_index * 4) % max(self.width - size, 1)
+        y = (self.height - size) // 2
+        frame[y:y + size, x:x + size] = (0, 200, 255)
+        self.frame_index += 1
+        return True, frame
+
+    def release(self):
+        self._opened = False
+
+
+def parse_source(source):
+    """Normalize a source spec from config.yaml: device index, 'synthetic[:WxH@FPS]' or a path/URL"""
+    if isinstance(source, int):
+        return source
+    source = str(source).strip()
+    if source.isdigit():
+        return int(source)
+    return source
+
+
+def open_source(source=0):
+    """Open a frame source.
+
+    ``source`` can be a camera index (``0``), a video file or stream URL, or
+    ``"synthetic"`` / ``"synthetic:640x480@30"`` for generated frames.
+    """
+    source = parse_source(source)
+
+    if isinstance(source, str) and source.startswith("synthetic"):
+        width, height, fps = 640, 480, 30
+        _, _, spec = source.partition(":")
+        if spec:
+            size, _, rate = spec.partition("@")
+            if size:
+                width, height = (int(v) for v in size.lower().split("x"))
+            if rate:
+                fps = float(rate)
+        return SyntheticSource(width, height, fps)
+
+    import cv2
+    return cv2.VideoCapture(source)
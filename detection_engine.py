@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Batched multi-camera detection engine.
+
+One YOLO model serves every camera: frames from N sources are gathered into
+micro-batches (up to ``max_batch`` frames, or whatever arrived within
+``max_latency`` of the oldest waiting frame) and run through a single
+batched forward pass. Results are handed back per source.
+
+Run ``python detection_engine.py`` to start the cameras listed under
+``cameras:`` in config.yaml.
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import Future
+
+from pipeline import DropOldestQueue
+
+
+class BatchedDetectionEngine:
+    """Collects frames from many sources and runs them through one model in batches.
+
+    Only the newest pending frame of each source is kept: if a camera submits
+    again before its previous frame was batched, the old frame's future is
+    cancelled. That keeps results fresh and shares the batch fairly between
+    cameras.
+    """
+
+    def __init__(self, infer_batch, max_batch=8, max_latency=0.05, with_sources=False):
+        self.infer_batch = infer_batch
+        # with_sources: call infer_batch(frames, source_ids) for per-camera settings
+        self.with_sources = with_sources
+        self.max_batch = max(1, int(max_batch))
+        self.max_latency = max_latency
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+        self.batches = 0
+        self.frames = 0
+        self.replaced = 0
+        self.forward_time = 0.0
+        self.forward_cpu = 0.0
+        self.latency_total = 0.0
+        self.started = None
+
+    def start(self):
+        self._stop = False
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="detection-engine", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._cond:
+            for _, _, future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+
+    def submit(self, source_id, frame):
+        """Queue a frame from ``source_id``; the returned future resolves to its detections"""
+        future = Future()
+        with self._cond:
+            previous = self._pending.get(source_id)
+            if previous is not None:
+                previous[2].cancel()
+                self.replaced += 1
+            self._pending[source_id] = (frame, time.perf_counter(), future)
+            self._cond.notify()
+        return future
+
+    def _collect(self):
+        """Wait for a batch: full, or the oldest frame has waited max_latency"""
+        with self._cond:
+            while not self._pending and not self._stop:
+                self._cond.wait()
+            if self._stop:
+                return []
+
+            oldest = min(submitted for _, submitted, _ in self._pending.values())
+            deadline = oldest + self.max_latency
+            while len(self._pending) < self.max_batch and not self._stop:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Oldest submissions first so no source waits longer than it has to
+            ordered = sorted(self._pending.items(), key=lambda item: item[1][1])
+            batch = ordered[:self.max_batch]
+            for source_id, _ in batch:
+                del self._pending[source_id]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                if self._stop:
+                    break
+                continue
+
+            live = [(source_id, item) for source_id, item in batch
+                    if item[2].set_running_or_notify_cancel()]
+            if not live:
+                continue
+
+            frames = [item[0] for _, item in live]
+            start, cpu_start = time.perf_counter(), time.process_time()
+            try:
+                if self.with_sources:
+                    results = self.infer_batch(frames, [source_id for source_id, _ in live])
+                else:
+                    results = self.infer_batch(frames)
+            except Exception as e:
+                for _, item in live:
+                    item[2].set_exception(e)
+                continue
+            done, cpu_done = time.perf_counter(), time.process_time()
+
+            self.batches += 1
+            self.frames += len(live)
+            self.forward_time += done - start
+            self.forward_cpu += cpu_done - cpu_start
+            for (_, (_, submitted, future)), result in zip(live, results):
+                self.latency_total += done - submitted
+                future.set_result(result)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "replaced": self.replaced,
+            "avg_batch": self.frames / self.batches if self.batches else 0.0,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "avg_forward_ms": 1000.0 * self.forward_time / self.batches if self.batches else 0.0,
+            "avg_latency_ms": 1000.0 * self.latency_total / self.frames if self.frames else 0.0,
+            "frames_per_cpu_second": self.frames / self.forward_cpu if self.forward_cpu > 0 else 0.0,
+        }
+
+
+class MultiCameraRunner:
+    """Feeds several frame sources into one BatchedDetectionEngine.
+
+    Each source gets a capture thread that submits its newest frame; finished
+    results arrive on ``results`` as ``(source_id, frame, detections)``.
+    """
+
+    def __init__(self, engine, sources, queue_size=None):
+        self.engine = engine
+        self.sources = dict(sources)
+        self.results = DropOldestQueue(queue_size or 2 * len(self.sources) or 1)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.engine.start()
+        for source_id, source in self.sources.items():
+            thread = threading.Thread(target=self._capture_loop, args=(source_id, source),
+                                      name=f"capture-{source_id}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _capture_loop(self, source_id, source):
+        while not self._stop.is_set():
+            ret, frame = source.read()
+            if not ret:
+                break
+            future = self.engine.submit(source_id, frame)
+            future.add_done_callback(
+                lambda f, sid=source_id, fr=frame: self._deliver(sid, fr, f))
+
+    def _deliver(self, source_id, frame, future):
+        if not future.cancelled() and future.exception() is None:
+            self.results.put((source_id, frame, future.result()))
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self.engine.stop()
+        self.results.close()
+        for source in self.sources.values():
+            source.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run batched detection over the cameras in config.yaml")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--seconds", type=float, default=0, help="stop after N seconds (0 = run until Ctrl+C)")
+    args = parser.parse_args()
+
+    from backends import get_backend
+    from camera import open_source
+    from roi import MultiCameraRoiDetector
+    from utils import load_config
+
+    config = load_config(args.config)
+    engine_config = config.get("engine") or {}
+    cameras = config.get("cameras") or [{"name": "camera0", "source": 0}]
+
+    print("⏳ Loading YOLO model...")
+    # Each camera's ROIs and img_size apply inside the shared batches
+    detector = MultiCameraRoiDetector.from_config(get_backend(config), {"cameras": cameras})
+    print(f"✅ {detector.startup}")
+
+    engine = BatchedDetectionEngine(
+        detector.detect_batch,
+        max_batch=engine_config.get("max_batch", 8),
+        max_latency=engine_config.get("max_latency_ms", 50) / 1000.0,
+        with_sources=True,
+    )
+    runner = MultiCameraRunner(engine, {cam["name"]: open_source(cam.get("source", 0)) for cam in cameras})
+    runner.start()
+    print(f"🔍 Detecting on {len(cameras)} camera(s) - Press Ctrl+C to stop\n")
+
+    occupied = {}
+    started = time.time()
+    try:
+        while runner.running or len(runner.results):
+            if args.seconds and time.time() - started >= args.seconds:
+                break
+            item = runner.results.get(timeout=0.5)
+            if item is None:
+                continue
+            source_id, _, detections = item
+            present = detections.has_person()
+            if occupied.get(source_id) != present:
+                occupied[source_id] = present
+                print(f"{'👤' if present else '💤'} {source_id}: {'occupied' if present else 'empty'}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+
+    stats = engine.stats()
+    print(f"\n✅ {stats['frames']} frames in {stats['batches']} batches "
+          f"(avg batch {stats['avg_batch']:.1f}, {stats['fps']:.1f} fps, "
+          f"{stats['frames_per_cpu_second']:.1f} frames/CPU-s, latency {stats['avg_latency_ms']:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
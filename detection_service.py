@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Shared detection service.
+
+One long-running process owns the cameras and the model and publishes
+annotated JPEG frames and occupancy events over a local socket (a Unix
+socket where available, localhost TCP otherwise). Any number of
+subscribers - the Flask feed, the Streamlit dashboard, scripts - connect
+with ``DetectionClient`` instead of opening the camera themselves.
+
+Frames from every camera go through one BatchedDetectionEngine, so the
+model is only ever called from the engine thread, in shared batches that
+apply each camera's ROIs and input size.
+
+    python detection_service.py
+
+Wire format: every message is ``!II`` (header length, payload length), a
+JSON header and an optional binary payload (the JPEG for frame messages).
+A client starts by sending ``{"subscribe": ["frames", "occupancy"]}``.
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+from pipeline import DropOldestQueue
+
+# The per-user runtime dir rather than the shared /tmp where there is one
+DEFAULT_UNIX_ADDRESS = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+                                    "smartenergy-detection.sock")
+DEFAULT_TCP_ADDRESS = "127.0.0.1:5055"
+_PREFIX = struct.Struct("!II")
+
+
+def service_address(config=None):
+    settings = (config or {}).get("service") or {}
+    default = DEFAULT_UNIX_ADDRESS if hasattr(socket, "AF_UNIX") else DEFAULT_TCP_ADDRESS
+    return settings.get("address") or default
+
+
+def _family(address):
+    """(socket family, bind/connect address) for 'host:port' or a socket path"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def _remove_stale_socket(path):
+    """Unlink a socket file left behind by a dead service; refuse if a live one answers"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A detection service is already listening on {path}")
+
+
+def send_message(sock, header, payload=b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_PREFIX.pack(len(data), len(payload)) + data + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks += chunk
+    return bytes(chunks)
+
+
+def recv_message(sock):
+    header_size, payload_size = _PREFIX.unpack(_recv_exact(sock, _PREFIX.size))
+    header = json.loads(_recv_exact(sock, header_size))
+    payload = _recv_exact(sock, payload_size) if payload_size else b""
+    return header, payload
+
+
+class Subscriber:
+    """One connected client with its own drop-oldest outboxes"""
+
+    def __init__(self, sock, topics):
+        self.sock = sock
+        self.topics = set(topics)
+        self.frames = DropOldestQueue(1)
+        self.events = DropOldestQueue(256)
+        self.alive = True
+        self._wake = threading.Event()
+        self.thread = threading.Thread(target=self._send_loop, daemon=True)
+
+    def push_frame(self, header, payload):
+        if "frames" in self.topics:
+            self.frames.put((header, payload))
+            self._wake.set()
+
+    def push_event(self, header):
+        if "occupancy" in self.topics:
+            self.events.put((header, b""))
+            self._wake.set()
+
+    def _send_loop(self):
+        try:
+            while self.alive:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                # Occupancy events are small and must not be starved by frames
+                for queue in (self.events, self.frames):
+                    while True:
+                        item = queue.get(timeout=0)
+                        if item is None:
+                            break
+                        send_message(self.sock, *item)
+        except OSError:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        self.alive = False
+        self._wake.set()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class DetectionService:
+    """Runs detection on every configured camera and fans results out to subscribers"""
+
+    def __init__(self, config, logger, address=None):
+        self.config = config
+        self.logger = logger
+        self.address = address or service_address(config)
+        settings = config.get("service") or {}
+        self.jpeg_quality = settings.get("jpeg_quality", 80)
+        self.heartbeat = settings.get("heartbeat", 5.0)
+        self.subscribers = []
+        self.occupancy = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+        self.detector = None
+        self.engine = None
+
+    def cameras(self):
+        cameras = self.config.get("cameras")
+        if cameras:
+            return cameras
+        return [dict(self.config.get("camera") or {}, name="camera")]
+
+    def start(self):
+        family, address = _family(self.address)
+        if family == socket.AF_UNIX:
+            _remove_stale_socket(address)
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        if family == socket.AF_UNIX:
+            os.chmod(address, 0o600)
+        self._server.listen()
+        self._server.settimeout(0.5)
+
+        from backends import get_backend
+        from detection_engine import BatchedDetectionEngine
+        from roi import MultiCameraRoiDetector
+
+        engine_config = self.config.get("engine") or {}
+        self.detector = MultiCameraRoiDetector.from_config(get_backend(self.config), {"cameras": self.cameras()})
+        self.engine = BatchedDetectionEngine(
+            self.detector.detect_batch,
+            max_batch=engine_config.get("max_batch", 8),
+            max_latency=engine_config.get("max_latency_ms", 50) / 1000.0,
+            with_sources=True,
+        ).start()
+
+        self._spawn(self._accept_loop, "service-accept")
+        for camera in self.cameras():
+            self._spawn(self._camera_loop, f"service-{camera['name']}", camera)
+        self.logger.log_event("SERVICE", f"Detection service listening on {self.address}")
+        return self
+
+    def _spawn(self, target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                sock, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                sock.settimeout(5.0)
+                hello, _ = recv_message(sock)
+                sock.settimeout(None)
+            except (OSError, ValueError):
+                sock.close()
+                continue
+            subscriber = Subscriber(sock, hello.get("subscribe", ["frames", "occupancy"]))
+            with self._lock:
+                self.subscribers.append(subscriber)
+                snapshot = list(self.occupancy.values())
+            subscriber.thread.start()
+            for state in snapshot:
+                subscriber.push_event(state)
+
+    def _live_subscribers(self):
+        with self._lock:
+            self.subscribers = [s for s in self.subscribers if s.alive]
+            return list(self.subscribers)
+
+    def _detect(self, name, frame):
+        """Detections for one frame of camera ``name``, batched with the other cameras' frames"""
+        return self.engine.submit(name, frame).result()
+
+    def _camera_loop(self, camera_config):
+        import functools
+
+        import cv2
+        from camera import open_source
+        from main import detection_frames
+        from overlay import OverlayRenderer
+
+        name = camera_config["name"]
+        camera = open_source(camera_config.get("source", 0))
+        if not camera.isOpened():
+            self.logger.log_event("ERROR", f"Camera '{name}' could not be opened", room=name)
+            return
+        regions = self.detector.detector(name).regions
+        if regions:
+            self.logger.log_event("ROI", f"Detecting on {len(regions)} region(s): "
+                                         f"{', '.join(region.name for region in regions)}", room=name)
+        detector = functools.partial(self._detect, name)
+        self.logger.log_event("CAMERA", f"Camera '{name}' opened for the detection service", room=name)
+
+        renderer = OverlayRenderer()
+        seq = 0
+        last_state = None
+        last_sent = 0.0
+        try:
+            for frame, detections in detection_frames(camera, detector, self.config, self.logger):
+                if self._stop.is_set():
+                    break
+                seq += 1
+                now = time.time()
+                subscribers = self._live_subscribers()
+
+                state = {
+                    "type": "occupancy", "camera": name, "ts": now,
+                    "occupied": detections.has_person(),
+                    "person_count": detections.person_count(),
+                    "confidence": round(detections.max_confidence(), 3),
+                }
+                key = (state["occupied"], state["person_count"])
+                if key != last_state or now - last_sent >= self.heartbeat:
+                    if key != last_state:
+                        self.logger.log_event(
+                            "DETECTION" if state["occupied"] else "IDLE",
+                            f"[{name}] {state['person_count']} person(s) detected",
+                            room=name, count=state["person_count"])
+                    with self._lock:
+                        self.occupancy[name] = state
+                    for subscriber in subscribers:
+                        subscriber.push_event(state)
+                    last_state, last_sent = key, now
+
+                # Encode once per frame, and only if someone is watching
+                if any("frames" in s.topics for s in subscribers):
+                    ok, buffer = cv2.imencode(".jpg", renderer.render(frame, detections),
+                                              [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                    if ok:
+                        header = {"type": "frame", "camera": name, "seq": seq, "ts": now}
+                        payload = buffer.tobytes()
+                        for subscriber in subscribers:
+                            subscriber.push_frame(header, payload)
+        finally:
+            camera.release()
+
+    def run_forever(self):
+        try:
+            while not self._stop.is_set():
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        if self._server:
+            self._server.close()
+        for subscriber in self._live_subscribers():
+            subscriber.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        if self.engine:
+            self.engine.stop()
+        family, address = _family(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.unlink(address)
+        self.logger.log_event("SERVICE", "Detection service stopped")
+
+
+class DetectionClient:
+    """Subscribes to the detection service and keeps the latest frame and occupancy per camera"""
+
+    def __init__(self, address, topics=("frames", "occupancy"), reconnect=1.0):
+        self.address = address
+        self.topics = list(topics)
+        self.reconnect = reconnect
+        self.occupancy = {}
+        self.frames = {}
+        self.connected = False
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._sock = None
+        self._thread = threading.Thread(target=self._read_loop, name="detection-client", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _connect(self):
+        family, address = _family(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.connect(address)
+        send_message(sock, {"subscribe": self.topics})
+        return sock
+
+    def _read_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._sock = self._connect()
+                self.connected = True
+                while not self._stop.is_set():
+                    header, payload = recv_message(self._sock)
+                    with self._cond:
+                        if header.get("type") == "frame":
+                            self.frames[header["camera"]] = (header["seq"], payload)
+                        elif header.get("type") == "occupancy":
+                            self.occupancy[header["camera"]] = header
+                        self._cond.notify_all()
+            except (OSError, ValueError):
+                pass
+            self.connected = False
+            if self._sock:
+                self._sock.close()
+            if not self.reconnect:
+                break
+            self._stop.wait(self.reconnect)
+
+    def wait_frame(self, camera=None, after=0, timeout=1.0):
+        """Block until a frame newer than ``after`` arrives; returns (seq, jpeg) or None"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                camera = camera or next(iter(self.frames), None)
+                latest = self.frames.get(camera) if camera else None
+                if latest and latest[0] != after:
+                    return latest
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def iter_frames(self, camera=None):
+        """Yield JPEG bytes for each new frame, skipping any that arrive while the caller is busy"""
+        seq = 0
+        while not self._stop.is_set():
+            latest = self.wait_frame(camera, seq)
+            if latest is not None:
+                seq, jpeg = latest
+                yield jpeg
+
+    def close(self):
+        self._stop.set()
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the shared detection service")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--address", help="Unix socket path or host:port (default from config.yaml)")
+    args = parser.parse_args()
+
+    from main import DetectionLogger
+    from utils import load_config
+
+    config = load_config(args.config) or {}
+    service = DetectionService(config, DetectionLogger.from_config(config), args.address).start()
+    print(f"📡 Detection service on {service.address} - Press Ctrl+C to stop")
+    service.run_forever()
+
+
+if __name__ == "__main__":
+    main()
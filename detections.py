@@ -0,0 +1,110 @@
+"""
+Detection results as plain arrays.
+
+YOLOv5 already returns an ``N x 6`` tensor per image (``x1, y1, x2, y2,
+confidence, class``). ``Detections`` keeps that array as-is and answers the
+questions the app asks (is there a person, how many, how confident) with
+vectorized numpy ops instead of building a pandas DataFrame per frame.
+"""
+
+import numpy as np
+
+PERSON = 0  # COCO class id
+
+COCO_NAMES = dict(enumerate([
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
+    "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat",
+    "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack",
+    "umbrella", "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball",
+    "kite", "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket",
+    "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple",
+    "sandwich", "orange", "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair",
+    "couch", "potted plant", "bed", "dining table", "toilet", "tv", "laptop", "mouse",
+    "remote", "keyboard", "cell phone", "microwave", "oven", "toaster", "sink",
+    "refrigerator", "book", "clock", "vase", "scissors", "teddy bear", "hair drier",
+    "toothbrush",
+]))
+
+
+class Detections:
+    """Detections for one frame, backed by an ``N x 6`` float array"""
+
+    __slots__ = ("data", "names")
+
+    def __init__(self, data=None, names=None):
+        if data is None:
+            data = np.empty((0, 6), dtype=np.float32)
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        self.names = names or COCO_NAMES
+
+    @classmethod
+    def from_results(cls, results, index=0):
+        """Wrap image ``index`` of a YOLOv5 results object without copying to pandas"""
+        data = results.xyxy[index]
+        if hasattr(data, "cpu"):
+            data = data.cpu().numpy()
+        names = getattr(results, "names", None)
+        if isinstance(names, (list, tuple)):
+            names = dict(enumerate(names))
+        return cls(data, names)
+
+    @classmethod
+    def from_batch(cls, results):
+        """One ``Detections`` per image of a batched YOLOv5 results object"""
+        return [cls.from_results(results, i) for i in range(len(results.xyxy))]
+
+    @property
+    def boxes(self):
+        return self.data[:, :4]
+
+    @property
+    def confidences(self):
+        return self.data[:, 4]
+
+    @property
+    def class_ids(self):
+        return self.data[:, 5].astype(np.int64)
+
+    def __len__(self):
+        return len(self.data)
+
+    def _mask(self, classes=None, min_confidence=0.0):
+        mask = self.data[:, 4] >= min_confidence
+        if classes is not None:
+            classes = list(classes)
+            if len(classes) == 1:
+                mask &= self.data[:, 5] == classes[0]
+            else:
+                mask &= np.isin(self.data[:, 5], np.asarray(classes, dtype=np.float32))
+        return mask
+
+    def filter(self, classes=None, min_confidence=0.0):
+        """Detections of the given class ids at or above ``min_confidence``"""
+        return Detections(self.data[self._mask(classes, min_confidence)], self.names)
+
+    def count(self, classes=(PERSON,), min_confidence=0.0):
+        return int(np.count_nonzero(self._mask(classes, min_confidence)))
+
+    def max_confidence(self, classes=(PERSON,)):
+        confidences = self.data[self._mask(classes), 4]
+        return float(confidences.max()) if len(confidences) else 0.0
+
+    def person_count(self, min_confidence=0.0):
+        return self.count((PERSON,), min_confidence)
+
+    def has_person(self, min_confidence=0.0):
+        return self.person_count(min_confidence) > 0
+
+
+def configure_model(model, config=None):
+    """Apply class filtering and confidence threshold inside the YOLOv5 model.
+
+    Filtering in the model's NMS step means unwanted classes never leave the
+    detector. Reads the ``detection:`` block of config.yaml.
+    """
+    settings = (config or {}).get("detection") or {}
+    classes = settings.get("classes", [PERSON])
+    model.classes = list(classes) if classes is not None else None
+    model.conf = settings.get("confidence", 0.25)
+    return model
+
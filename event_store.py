@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Structured, indexed store for detection events.
+
+When ``logging.store`` in config.yaml names a database file, DetectionLogger
+writes every event there as well: one SQLite row per event with typed
+columns, indexed by time, type and room, so "what happened in the study
+yesterday" is an index range scan instead of a pass over the whole text log. ``export`` renders events in
+the familiar ``detection_log.txt`` line format.
+
+    python event_store.py query --type DETECTION --since "2024-01-15" --room study
+    python event_store.py export --since "2024-01-15 08:00" --until "2024-01-15 18:00" -o day.txt
+    python event_store.py stats --since "2024-01-01"
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    room TEXT,
+    fan TEXT,
+    temperature REAL,
+    count INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_type_ts ON events (type, ts);
+CREATE INDEX IF NOT EXISTS events_room_ts ON events (room, ts);
+"""
+
+COLUMNS = ("ts", "type", "message", "room", "fan", "temperature", "count")
+
+# ``count`` is the detection number for DETECTION events and the frame count for RUN records
+Event = namedtuple("Event", ("id",) + COLUMNS)
+
+
+def format_event(event):
+    """The event as a detection_log.txt line (without newline)"""
+    line = f"[{datetime.fromtimestamp(event.ts).strftime('%Y-%m-%d %H:%M:%S')}] {event.type}: {event.message}"
+    if event.fan is not None:
+        line += f" → Fan: {event.fan}"
+    return line
+
+
+def parse_time(value):
+    """Epoch seconds from a number or an ISO date / date-time string"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class EventStore:
+    """SQLite event table; safe to share between threads"""
+
+    def __init__(self, path="detection_events.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets readers (dashboards, exports) run while the logger appends
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def add(self, ts, type, message, room=None, fan=None, temperature=None, count=None):
+        self.add_many([(ts, type, message, room, fan, temperature, count)])
+
+    def add_many(self, rows):
+        """Insert (ts, type, message, room, fan, temperature, count) tuples in one transaction"""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO events (ts, type, message, room, fan, temperature, count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows)
+
+    def _where(self, since, until, types, room):
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(parse_time(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(parse_time(until))
+        if types:
+            types = [types] if isinstance(types, str) else list(types)
+            clauses.append(f"type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        if room is not None:
+            clauses.append("room = ?")
+            params.append(room)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, since=None, until=None, types=None, room=None, limit=None, newest_first=False):
+        """Events in [since, until) of the given type(s) and room, in time order"""
+        where, params = self._where(since, until, types, room)
+        sql = f"SELECT id, {', '.join(COLUMNS)} FROM events{where} ORDER BY ts {'DESC' if newest_first else 'ASC'}, id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [Event(*row) for row in rows]
+
+    def tail(self, n=50, types=None, room=None):
+        """The last ``n`` matching events, oldest first"""
+        return self.query(types=types, room=room, limit=n, newest_first=True)[::-1]
+
+    def counts(self, since=None, until=None, room=None):
+        """Number of events per type in the range"""
+        where, params = self._where(since, until, None, room)
+        with self._lock:
+            rows = self._db.execute(f"SELECT type, COUNT(*) FROM events{where} GROUP BY type", params).fetchall()
+        return dict(rows)
+
+    def export(self, out, since=None, until=None, types=None, room=None, batch=5000):
+        """Write matching events to ``out`` in the detection_log.txt format; returns how many"""
+        written = 0
+        last = (parse_time(since) or float("-inf"), -1)
+        while True:
+            # Keyset pagination on (ts, id) keeps memory flat for months of events
+            where, params = self._where(None, until, types, room)
+            where += (" AND" if where else " WHERE") + " (ts > ? OR (ts = ? AND id > ?))"
+            params += [last[0], last[0], last[1]]
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT id, {', '.join(COLUMNS)} FROM events{where} ORDER BY ts, id LIMIT ?",
+                    params + [batch]).fetchall()
+            if not rows:
+                return written
+            for row in rows:
+                out.write(format_event(Event(*row)) + "\n")
+            written += len(rows)
+            last = (rows[-1][1], rows[-1][0])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and export the detection event store")
+    parser.add_argument("command", choices=("query", "export", "stats"))
+    parser.add_argument("--db", help="event store (default: logging.store from config.yaml)")
+    parser.add_argument("--since", help="epoch seconds or ISO date/time")
+    parser.add_argument("--until", help="epoch seconds or ISO date/time (exclusive)")
+    parser.add_argument("--type", action="append", help="event type, repeatable (DETECTION, IDLE, TEMP, ...)")
+    parser.add_argument("--room")
+    parser.add_argument("--limit", type=int, default=100, help="query: newest N events (0 = all)")
+    parser.add_argument("-o", "--output", help="export: file to write (default stdout)")
+    args = parser.parse_args()
+
+    path = args.db
+    if path is None:
+        from utils import load_config
+        path = ((load_config("config.yaml") or {}).get("logging") or {}).get("store") or "detection_events.db"
+    if not os.path.exists(path):
+        print(f"❌ No event store at {path}")
+        sys.exit(1)
+    store = EventStore(path)
+
+    if args.command == "query":
+        events = store.query(args.since, args.until, args.type, args.room, args.limit or None, newest_first=True)
+        for event in reversed(events):
+            print(format_event(event))
+    elif args.command == "stats":
+        for event_type, count in sorted(store.counts(args.since, args.until, args.room).items()):
+            print(f"{event_type:<12} {count:>10,}")
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            count = store.export(f, args.since, args.until, args.type, args.room)
+        print(f"✅ Exported {count:,} events to {args.output}")
+    else:
+        store.export(sys.stdout, args.since, args.until, args.type, args.room)
+
+
+if __name__ == "__main__":
+    main()
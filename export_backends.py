@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Export the cached YOLOv5 model to every CPU backend and validate it.
+
+    python export_backends.py                     # export + validate all
+    python export_backends.py --skip-export       # validate existing exports
+    python export_backends.py --source video.mp4  # validate on recorded frames
+
+For each backend the tool reports median latency per frame and how well its
+detections agree with the eager PyTorch model on the same frames (person
+count match rate and mean IoU of matched boxes).
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from backends import BACKENDS, create_backend, export_paths, inference_settings
+
+REAL_BACKENDS = tuple(b for b in BACKENDS if b != "stub")
+
+
+def inference_head(network):
+    """Wrap the network so it returns only the inference tensor of the Detect layer"""
+    import torch
+
+    class Head(torch.nn.Module):
+        def __init__(self, net):
+            super().__init__()
+            self.net = net
+
+        def forward(self, x):
+            out = self.net(x)
+            return out[0] if isinstance(out, (list, tuple)) else out
+
+    return Head(network).eval()
+
+
+def export_all(config, backends):
+    import torch
+    from model_registry import get_model
+
+    settings = inference_settings(config)
+    paths = export_paths(settings["name"], settings["cache_dir"])
+    size = settings["img_size"]
+
+    # AutoShape -> DetectMultiBackend -> DetectionModel
+    model = get_model(config).model.model.float()
+    for module in model.modules():
+        # Let the Detect layer rebuild its grid for other input sizes (per-camera img_size)
+        if hasattr(module, "dynamic"):
+            module.dynamic = True
+    network = inference_head(model)
+    dummy = torch.zeros(1, 3, size, size)
+
+    if "torchscript" in backends:
+        with torch.inference_mode():
+            traced = torch.jit.trace(network, dummy, strict=False)
+        traced.save(paths["torchscript"])
+        print(f"✅ TorchScript -> {paths['torchscript']}")
+
+    if "onnx" in backends or "onnx-int8" in backends:
+        torch.onnx.export(network, dummy, paths["onnx"], opset_version=12,
+                          input_names=["images"], output_names=["output0"],
+                          dynamic_axes={"images": {0: "batch", 2: "height", 3: "width"},
+                                        "output0": {0: "batch", 1: "anchors"}})
+        print(f"✅ ONNX -> {paths['onnx']}")
+
+    if "onnx-int8" in backends:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(paths["onnx"], paths["onnx-int8"], weight_type=QuantType.QUInt8)
+        print(f"✅ ONNX int8 (dynamic quantization) -> {paths['onnx-int8']}")
+
+
+def sample_frames(source, count):
+    from camera import open_source
+
+    capture = open_source(source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def box_iou(a, b):
+    """Pairwise IoU between ``N x 4`` and ``M x 4`` xyxy boxes"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = (rb - lt).clip(0).prod(2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def agreement(reference, candidate):
+    """Person-count match rate and mean best-IoU of reference boxes"""
+    matches, ious = 0, []
+    for ref, cand in zip(reference, candidate):
+        matches += ref.person_count() == cand.person_count()
+        if len(ref) and len(cand):
+            ious.extend(box_iou(ref.boxes, cand.boxes).max(1).tolist())
+        elif len(ref):
+            ious.extend([0.0] * len(ref))
+    return {
+        "count_match": matches / len(reference) if reference else 0.0,
+        "mean_iou": float(np.mean(ious)) if ious else 1.0,
+    }
+
+
+def measure(backend, frames, repeats):
+    backend.warm_up(frames[0].shape[0])
+    timings, outputs = [], []
+    for frame in frames:
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = backend.detect(frame)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append(best)
+        outputs.append(result)
+    return outputs, 1000.0 * float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and validate CPU inference backends")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--backends", nargs="+", default=list(REAL_BACKENDS), choices=REAL_BACKENDS)
+    parser.add_argument("--skip-export", action="store_true")
+    parser.add_argument("--source", default="synthetic", help="camera index, video file or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    from utils import load_config
+    config = load_config(args.config) or {}
+
+    if not args.skip_export:
+        export_all(config, [b for b in args.backends if b != "torch"])
+
+    frames = sample_frames(args.source, args.frames)
+    if not frames:
+        raise SystemExit(f"No frames could be read from {args.source}")
+
+    reference, reference_ms = measure(create_backend(config, "torch"), frames, args.repeats)
+    report = {"torch": {"latency_ms": reference_ms, "count_match": 1.0, "mean_iou": 1.0}}
+    for name in args.backends:
+        if name == "torch":
+            continue
+        try:
+            outputs, latency = measure(create_backend(config, name), frames, args.repeats)
+        except (ImportError, FileNotFoundError) as e:
+            report[name] = {"error": str(e)}
+            continue
+        report[name] = {"latency_ms": latency, **agreement(reference, outputs)}
+
+    print(f"\n{'backend':<12} {'latency ms':>10} {'speedup':>8} {'count match':>12} {'mean IoU':>9}")
+    for name, row in report.items():
+        if "error" in row:
+            print(f"{name:<12} ❌ {row['error']}")
+            continue
+        print(f"{name:<12} {row['latency_ms']:>10.1f} {reference_ms / row['latency_ms']:>7.2f}x "
+              f"{100 * row['count_match']:>11.0f}% {row['mean_iou']:>9.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"frames": len(frames), "source": str(args.source), "backends": report}, f, indent=2)
+        print(f"\n📁 Report written to {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
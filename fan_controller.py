@@ -1,31 +1,59 @@
 
+import threading
 import time
-try:
-    import RPi.GPIO as GPIO
-except ImportError:
-    GPIO = None
+
+from actuator_bank import default_bank
 
 class FanController:
-    def __init__(self, pin, off_delay=10):
+    def __init__(self, pin, off_delay=10, bank=None):
         self.pin = pin
         self.off_delay = off_delay
         self.fan_on = False
         self.last_seen = 0
-        if GPIO:
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setup(self.pin, GPIO.OUT)
+        self.listeners = []
+        # turn_off may also be called from a FanScheduler thread
+        self._lock = threading.Lock()
+        # The bank sets the pin up once and batches writes (RPi.GPIO, or simulated off the Pi)
+        self.bank = bank if bank is not None else default_bank()
+        self.bank.setup(self.pin)
 
     def turn_on(self):
         if not self.fan_on:
-            print("🌀 Fan ON")
-            if GPIO: GPIO.output(self.pin, GPIO.HIGH)
-            self.fan_on = True
+            self._switch(True)
 
     def turn_off(self):
-        if self.fan_on and time.time() - self.last_seen > self.off_delay:
-            print("💤 Fan OFF (No activity)")
-            if GPIO: GPIO.output(self.pin, GPIO.LOW)
-            self.fan_on = False
+        self.switch_off_if_idle()
+
+    def switch_off(self):
+        """Switch off now, regardless of off_delay"""
+        if self.fan_on:
+            self._switch(False)
+
+    def switch_off_if_idle(self, now=None):
+        """Switch off if nobody was seen for off_delay; checked and switched under one lock"""
+        with self._lock:
+            now = time.time() if now is None else now
+            if not self.fan_on or now - self.last_seen <= self.off_delay:
+                return False
+            self._set(False)
+            return True
 
     def update_last_seen(self):
-        self.last_seen = time.time()
+        with self._lock:
+            self.last_seen = time.time()
+
+    def add_listener(self, callback):
+        """Call ``callback(fan_on)`` after every ON/OFF transition"""
+        self.listeners.append(callback)
+
+    def _switch(self, on):
+        with self._lock:
+            if self.fan_on != on:
+                self._set(on)
+
+    def _set(self, on):
+        print("🌀 Fan ON" if on else "💤 Fan OFF (No activity)")
+        self.bank.set(self.pin, on)
+        self.fan_on = on
+        for listener in self.listeners:
+            listener(on)
@@ -0,0 +1,122 @@
+"""
+Off-delay scheduling for any number of fans.
+
+FanController.turn_off only switches off when it is called after
+``off_delay`` has passed, so a fan stays on while the detection loop is
+stalled or running at a low rate. FanScheduler keeps one off deadline per
+running fan in a heap and a single background thread switches each fan off
+when its deadline passes.
+
+A deadline is armed when a fan turns on (O(log n)). Detection frames only
+move ``fan.last_seen``; when a deadline comes up the thread re-reads it and
+re-arms the fan if it was seen since, so each running fan has exactly one
+heap entry no matter how often it is seen.
+
+    scheduler = FanScheduler()
+    fan = scheduler.add(FanController(17, off_delay=15))
+    ...
+    scheduler.close()
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class FanScheduler:
+    """Switches registered fans off ``off_delay`` seconds after they were last seen"""
+
+    def __init__(self):
+        self.fans = []
+        self.switched_off = 0
+        self._heap = []
+        self._armed = {}  # id(fan) -> deadline of its heap entry
+        self._order = itertools.count()
+        self._wake = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def add(self, fan):
+        """Manage ``fan`` (anything with fan_on, last_seen, off_delay, switch_off_if_idle and add_listener)"""
+        with self._wake:
+            self.fans.append(fan)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fan-scheduler", daemon=True)
+                self._thread.start()
+        fan.add_listener(lambda on: self._on_change(fan, on))
+        if fan.fan_on:
+            self._arm(fan)
+        return fan
+
+    def pending(self):
+        """Number of fans waiting to be switched off"""
+        with self._wake:
+            return len(self._armed)
+
+    def next_deadline(self):
+        with self._wake:
+            return self._heap[0][0] if self._heap else None
+
+    def _on_change(self, fan, on):
+        if on:
+            self._arm(fan)
+        else:
+            with self._wake:
+                # The heap entry is dropped lazily when it comes up
+                self._armed.pop(id(fan), None)
+
+    def _arm(self, fan):
+        # turn_on runs before update_last_seen, so don't trust an older last_seen yet
+        deadline = max(time.time(), fan.last_seen) + fan.off_delay
+        with self._wake:
+            if id(fan) in self._armed:
+                return
+            self._armed[id(fan)] = deadline
+            heapq.heappush(self._heap, (deadline, next(self._order), fan))
+            if self._heap[0][2] is fan:
+                self._wake.notify()
+
+    def _due(self, now):
+        """Pop the fans whose deadline has passed; re-arm those seen since"""
+        expired = []
+        with self._wake:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, fan = heapq.heappop(self._heap)
+                if self._armed.get(id(fan)) != deadline:
+                    continue  # switched off meanwhile, or a stale entry
+                del self._armed[id(fan)]
+                seen_until = fan.last_seen + fan.off_delay
+                if seen_until > now:
+                    self._armed[id(fan)] = seen_until
+                    heapq.heappush(self._heap, (seen_until, next(self._order), fan))
+                else:
+                    expired.append(fan)
+        return expired
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._stopped:
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._wake.wait(timeout)
+                if self._stopped:
+                    return
+            # Switch outside the lock: listeners (stats, logging) may take their own locks
+            for fan in self._due(time.time()):
+                # The fan re-checks last_seen under its own lock, so a detection that lands
+                # after _due looked keeps it on
+                if fan.switch_off_if_idle():
+                    self.switched_off += 1
+                elif fan.fan_on:
+                    self._arm(fan)
+
+    def close(self):
+        """Stop the scheduler thread; fans keep their current state"""
+        with self._wake:
+            self._stopped = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
@@ -0,0 +1,131 @@
+"""
+CPU-budget governor for the detection loops.
+
+Instead of running inference on every camera frame, the governor measures
+what each inference costs and spaces them out so detection stays within a
+target share of one CPU core (and/or a detections-per-second cap). When
+occupancy changes it briefly boosts to full rate so the fan reacts quickly.
+"""
+
+import time
+from collections import deque
+
+
+class RateGovernor:
+    """Decides when the next inference may run"""
+
+    def __init__(self, cpu_share=0.5, max_rate=0, max_interval=2.0,
+                 boost_seconds=3.0, smoothing=0.2, window=10.0):
+        self.cpu_share = cpu_share
+        self.max_rate = max_rate
+        self.max_interval = max_interval
+        self.boost_seconds = boost_seconds
+        self.smoothing = smoothing
+        self.window = window
+
+        self.avg_cost = 0.0
+        self.interval = 0.0
+        self.last_run = None
+        self.boost_until = 0.0
+        self.occupied = None
+        self.runs = 0
+        self.skipped = 0
+        self._history = deque()
+
+    @classmethod
+    def from_config(cls, config):
+        settings = (config or {}).get("governor") or {}
+        return cls(
+            cpu_share=settings.get("cpu_share", 0.5),
+            max_rate=settings.get("max_rate", 0),
+            max_interval=settings.get("max_interval", 2.0),
+            boost_seconds=settings.get("boost_seconds", 3.0),
+        )
+
+    def boosting(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now < self.boost_until
+
+    def due(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.last_run is None or self.boosting(now):
+            return True
+        if now - self.last_run >= self.interval:
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, cost, now=None):
+        """Record one inference that took ``cost`` CPU seconds"""
+        now = time.monotonic() if now is None else now
+        self.runs += 1
+        self.last_run = now
+        self.avg_cost = cost if self.runs == 1 else (
+            self.smoothing * cost + (1 - self.smoothing) * self.avg_cost)
+
+        interval = self.avg_cost / self.cpu_share if self.cpu_share else 0.0
+        if self.max_rate:
+            interval = max(interval, 1.0 / self.max_rate)
+        self.interval = min(interval, self.max_interval)
+
+        self._history.append((now, cost))
+        while self._history and now - self._history[0][0] > self.window:
+            self._history.popleft()
+
+    def notify_occupancy(self, occupied, now=None):
+        """Boost to full rate for a while whenever occupancy flips"""
+        now = time.monotonic() if now is None else now
+        if self.occupied is not None and occupied != self.occupied:
+            self.boost_until = now + self.boost_seconds
+        self.occupied = occupied
+
+    def snapshot(self, now=None):
+        now = time.monotonic() if now is None else now
+        recent = [(t, c) for t, c in self._history if now - t <= self.window]
+        span = min(self.window, now - recent[0][0]) if recent else 0.0
+        return {
+            "rate": len(recent) / span if span > 0 else 0.0,
+            "interval_ms": 1000.0 * self.interval,
+            "avg_cost_ms": 1000.0 * self.avg_cost,
+            "cpu_share_target": self.cpu_share,
+            "cpu_share_used": sum(c for _, c in recent) / span if span > 0 else 0.0,
+            "boosting": self.boosting(now),
+            "inferences": self.runs,
+            "skipped": self.skipped,
+        }
+
+    def format_stats(self):
+        stats = self.snapshot()
+        return (f"{stats['rate']:.1f} detections/s (every {stats['interval_ms']:.0f} ms), "
+                f"CPU {100 * stats['cpu_share_used']:.0f}% of {100 * stats['cpu_share_target']:.0f}% budget, "
+                f"inference {stats['avg_cost_ms']:.1f} ms"
+                + (", boosting" if stats["boosting"] else ""))
+
+
+class GovernedDetector:
+    """Wraps a detect callable so inference only runs when the governor allows it"""
+
+    def __init__(self, detect, governor):
+        self.detect = detect
+        self.governor = governor
+        self.last_result = None
+
+    def __call__(self, frame):
+        if self.last_result is not None and not self.governor.due():
+            return self.last_result
+
+        # Process CPU time: torch / onnxruntime run inference on their own worker threads.
+        # It also counts whatever other threads did meanwhile, which errs on the safe side.
+        start = time.process_time()
+        result = self.detect(frame)
+        self.governor.record(time.process_time() - start)
+        if hasattr(result, "has_person"):
+            self.governor.notify_occupancy(result.has_person())
+        self.last_result = result
+        return result
+
+    def stats(self):
+        return self.governor.snapshot()
+
+    def format_stats(self):
+        return self.governor.format_stats()
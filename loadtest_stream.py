@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Load test for the MJPEG /video_feed endpoint.
+
+Opens many concurrent streaming connections with plain asyncio sockets and
+reports time to first frame, per-connection frame rate, aggregate
+throughput and (when the server sends ``X-Frame-Time``, as app_asgi.py
+does) capture-to-receive latency.
+
+    python app_asgi.py &
+    python loadtest_stream.py --clients 200 --duration 20
+    python loadtest_stream.py --url http://localhost:5000/video_feed --clients 20 --json out.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from urllib.parse import urlsplit
+
+MARKER = b"--frame\r\n"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(pct / 100.0 * len(values)) - 1))]
+
+
+class ClientStats:
+    def __init__(self):
+        self.connected = False
+        self.first_frame = None
+        self.frames = 0
+        self.bytes = 0
+        self.latencies = []
+        self.error = None
+
+
+async def stream_client(host, port, path, duration, stats, read_size=65536):
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 10)
+    except (OSError, asyncio.TimeoutError) as e:
+        stats.error = f"connect: {e}"
+        return
+    stats.connected = True
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+
+    buffer = b""
+    deadline = started + duration
+    try:
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                data = await asyncio.wait_for(reader.read(read_size), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                break
+            stats.bytes += len(data)
+            buffer += data
+            # Every part starts with the boundary; its headers end at the blank line
+            while True:
+                start = buffer.find(MARKER)
+                if start < 0:
+                    buffer = buffer[-len(MARKER):]
+                    break
+                end = buffer.find(b"\r\n\r\n", start)
+                if end < 0:
+                    buffer = buffer[start:]
+                    break
+                now = time.perf_counter()
+                if stats.first_frame is None:
+                    stats.first_frame = now - started
+                stats.frames += 1
+                for line in buffer[start + len(MARKER):end].split(b"\r\n"):
+                    if line.lower().startswith(b"x-frame-time:"):
+                        stats.latencies.append(time.time() - float(line.split(b":", 1)[1]))
+                buffer = buffer[end + 4:]
+    except OSError as e:
+        stats.error = str(e)
+    finally:
+        writer.close()
+
+
+async def run(url, clients, duration, ramp):
+    parts = urlsplit(url)
+    host, port = parts.hostname or "localhost", parts.port or 80
+    path = (parts.path or "/video_feed") + (f"?{parts.query}" if parts.query else "")
+    all_stats = [ClientStats() for _ in range(clients)]
+
+    tasks = []
+    for stats in all_stats:
+        tasks.append(asyncio.create_task(stream_client(host, port, path, duration, stats)))
+        if ramp:
+            await asyncio.sleep(ramp / clients)
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started + (ramp or 0)
+
+    ok = [s for s in all_stats if s.frames]
+    fps = [s.frames / duration for s in ok]
+    ttff = [s.first_frame for s in ok]
+    latencies = [l for s in ok for l in s.latencies]
+    return {
+        "url": url,
+        "clients": clients,
+        "connected": sum(s.connected for s in all_stats),
+        "receiving": len(ok),
+        "errors": sorted({s.error for s in all_stats if s.error}),
+        "duration_s": elapsed,
+        "total_frames": sum(s.frames for s in all_stats),
+        "throughput_fps": sum(s.frames for s in all_stats) / duration,
+        "throughput_mbps": 8 * sum(s.bytes for s in all_stats) / duration / 1e6,
+        "client_fps": {"min": min(fps, default=0.0), "p50": percentile(fps, 50), "max": max(fps, default=0.0)},
+        "first_frame_ms": {"p50": 1000 * percentile(ttff, 50), "p95": 1000 * percentile(ttff, 95),
+                           "max": 1000 * max(ttff, default=0.0)},
+        "frame_latency_ms": {"p50": 1000 * percentile(latencies, 50), "p95": 1000 * percentile(latencies, 95),
+                             "p99": 1000 * percentile(latencies, 99)} if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent MJPEG stream load test")
+    parser.add_argument("--url", default="http://localhost:5000/video_feed")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds each client streams")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which clients connect")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.url, args.clients, args.duration, args.ramp))
+    print(f"👥 {report['receiving']}/{report['clients']} clients receiving frames")
+    print(f"📦 {report['throughput_fps']:.0f} frames/s total, {report['throughput_mbps']:.1f} Mbit/s")
+    print(f"🎞️  per client fps: min {report['client_fps']['min']:.1f} / "
+          f"median {report['client_fps']['p50']:.1f} / max {report['client_fps']['max']:.1f}")
+    print(f"⏱️  first frame: median {report['first_frame_ms']['p50']:.0f} ms, "
+          f"p95 {report['first_frame_ms']['p95']:.0f} ms")
+    if report["frame_latency_ms"]:
+        print(f"⏱️  frame latency: p50 {report['frame_latency_ms']['p50']:.0f} ms, "
+              f"p95 {report['frame_latency_ms']['p95']:.0f} ms, p99 {report['frame_latency_ms']['p99']:.0f} ms")
+    if report["errors"]:
+        print(f"❌ errors: {', '.join(report['errors'][:5])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Rotation, compression and retention for detection_log.txt, plus a reader
+that spans the rotated segments.
+
+When the active log passes ``max_mb`` or its first event is older than
+``max_age_hours`` it is renamed to a segment named after the time range it
+covers, e.g. ``detection_log.20240115T143025-20240116T143020.txt``, and then
+gzipped in the background. ``iter_events`` picks segments by the range in
+their names, so a query for one day never opens (or decompresses) the others.
+"""
+
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+NAME_TIME = "%Y%m%dT%H%M%S"
+LINE_TIME = "%Y-%m-%d %H:%M:%S"
+LINE = re.compile(r"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] ([A-Z_]+): (.*?)(?: → Fan: (\S+))?$")
+
+LogEvent = namedtuple("LogEvent", ("ts", "type", "message", "fan", "line"))
+Segment = namedtuple("Segment", ("start", "end", "index", "path", "compressed"))
+
+
+def parse_line(line):
+    """LogEvent for a ``[time] TYPE: message → Fan: X`` line, None for headers and summaries"""
+    line = line.rstrip("\n")
+    match = LINE.match(line)
+    if not match:
+        return None
+    stamp, event_type, message, fan = match.groups()
+    return LogEvent(datetime.strptime(stamp, LINE_TIME).timestamp(), event_type, message, fan, line)
+
+
+def _split(log_file):
+    directory, name = os.path.split(os.path.abspath(log_file))
+    base, ext = os.path.splitext(name)
+    return directory, base, ext
+
+
+def segment_path(log_file, start, end, index=0):
+    directory, base, ext = _split(log_file)
+    span = f"{datetime.fromtimestamp(start).strftime(NAME_TIME)}-{datetime.fromtimestamp(end).strftime(NAME_TIME)}"
+    return os.path.join(directory, f"{base}.{span}{f'.{index}' if index else ''}{ext}")
+
+
+def segments(log_file):
+    """Rotated segments of ``log_file`` in time order (the active file is not included)"""
+    directory, base, ext = _split(log_file)
+    pattern = re.compile(re.escape(base) + r"\.(\d{8}T\d{6})-(\d{8}T\d{6})(?:\.(\d+))?" + re.escape(ext) + r"(\.gz)?$")
+    found = {}
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if not match:
+            continue
+        start, end, index, gz = match.groups()
+        segment = Segment(datetime.strptime(start, NAME_TIME).timestamp(),
+                          datetime.strptime(end, NAME_TIME).timestamp(),
+                          int(index or 0), os.path.join(directory, name), bool(gz))
+        key = segment[:3]
+        # While a segment is being compressed both files exist. The .gz is renamed into
+        # place only once complete, and the plain file is deleted right after: read the .gz
+        if key not in found or segment.compressed:
+            found[key] = segment
+    return sorted(found.values())
+
+
+def _open(path, compressed):
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _open_segment(segment):
+    try:
+        return _open(segment.path, segment.compressed)
+    except FileNotFoundError:
+        if segment.compressed:
+            return None  # removed by retention
+    # Compressed since we listed it: the .gz is complete by the time the plain file is gone
+    try:
+        return _open(segment.path + ".gz", True)
+    except FileNotFoundError:
+        return None
+
+
+def _read(f, since, until, types):
+    with f:
+        for line in f:
+            event = parse_line(line)
+            if event is None:
+                continue
+            if since is not None and event.ts < since:
+                continue
+            if until is not None and event.ts >= until:
+                return
+            if types and event.type not in types:
+                continue
+            yield event
+
+
+def iter_events(log_file, since=None, until=None, types=None):
+    """Events in [since, until) from the rotated segments and the active log, oldest first"""
+    types = set([types] if isinstance(types, str) else types or ())
+    for segment in segments(log_file):
+        # Names hold whole seconds, like the event lines themselves
+        if since is not None and segment.end < int(since):
+            continue
+        if until is not None and segment.start >= until:
+            return
+        f = _open_segment(segment)
+        if f is not None:
+            yield from _read(f, since, until, types)
+    try:
+        f = _open(log_file, False)
+    except FileNotFoundError:
+        return
+    yield from _read(f, since, until, types)
+
+
+def _last_event_time(path, block=65536):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - block))
+        lines = f.read().decode("utf-8", errors="replace").splitlines()
+    for line in reversed(lines):
+        event = parse_line(line)
+        if event is not None:
+            return event.ts
+    return None
+
+
+def _first_event_time(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            event = parse_line(line)
+            if event is not None:
+                return event.ts
+    return None
+
+
+class LogRotator:
+    """Decides when the active log is rotated and maintains the rotated segments"""
+
+    def __init__(self, log_file, max_bytes=0, max_age=0, compress=True, retention=0, max_segments=0):
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.retention = retention
+        self.max_segments = max_segments
+        self.size = 0
+        self.first_ts = None
+        self.last_ts = None
+        self._maintenance = threading.Lock()
+        self.load()
+        # Finish whatever an earlier run left uncompressed
+        self._maintain_async()
+
+    @classmethod
+    def from_config(cls, log_file, settings):
+        """Rotator for the ``logging.rotation`` block, or None when rotation is off"""
+        settings = settings or {}
+        max_bytes = int(float(settings.get("max_mb", 0)) * 1024 * 1024)
+        max_age = float(settings.get("max_age_hours", 0)) * 3600
+        if not max_bytes and not max_age:
+            return None
+        return cls(log_file, max_bytes, max_age, settings.get("compress", True),
+                   float(settings.get("retention_days", 0)) * 86400, settings.get("max_segments", 0))
+
+    def load(self):
+        """Pick up size and event time range of an existing active log"""
+        if os.path.exists(self.log_file):
+            self.size = os.path.getsize(self.log_file)
+            self.first_ts = _first_event_time(self.log_file)
+            self.last_ts = _last_event_time(self.log_file) if self.first_ts is not None else None
+
+    def due(self, incoming, ts):
+        """Whether the active log must be rotated before writing ``incoming`` bytes of events at ``ts``"""
+        if self.first_ts is None:
+            return False
+        if self.max_bytes and self.size + incoming > self.max_bytes:
+            return True
+        return bool(self.max_age and ts - self.first_ts >= self.max_age)
+
+    def written(self, size, first_ts=None, last_ts=None):
+        self.size += size
+        if first_ts is not None and self.first_ts is None:
+            self.first_ts = first_ts
+        if last_ts is not None:
+            self.last_ts = last_ts
+
+    def rotate(self):
+        """Rename the active log to its segment name; compression and retention run in the background"""
+        index = 0
+        while True:
+            path = segment_path(self.log_file, self.first_ts, self.last_ts or self.first_ts, index)
+            if not os.path.exists(path) and not os.path.exists(path + ".gz"):
+                break
+            index += 1
+        os.replace(self.log_file, path)
+        self.size = 0
+        self.first_ts = self.last_ts = None
+        self._maintain_async()
+        return path
+
+    def _maintain_async(self):
+        threading.Thread(target=self.maintain, name="log-rotation", daemon=True).start()
+
+    def maintain(self):
+        """Compress finished segments and apply the retention policy"""
+        with self._maintenance:
+            try:
+                rotated = segments(self.log_file)
+            except OSError:
+                return
+            if self.compress:
+                for segment in rotated:
+                    if not segment.compressed:
+                        self._compress(segment.path)
+            rotated = segments(self.log_file)
+            expired = []
+            if self.retention:
+                cutoff = time.time() - self.retention
+                expired = [segment for segment in rotated if segment.end < cutoff]
+            if self.max_segments and len(rotated) - len(expired) > self.max_segments:
+                kept = [segment for segment in rotated if segment not in expired]
+                expired += kept[:len(kept) - self.max_segments]
+            for segment in expired:
+                try:
+                    os.remove(segment.path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _compress(path):
+        partial = path + ".gz.part"
+        try:
+            with open(path, "rb") as src, gzip.open(partial, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(partial, path + ".gz")
+            os.remove(path)
+        except OSError as e:
+            print(f"❌ Could not compress {path}: {e}")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tail and follow for detection_log.txt.
+
+``tail_lines`` seeks to the end of the log and reads backwards in blocks
+until it has the requested number of matching lines, so showing the last 50
+events costs the same on a 5 KB and on a 5 GB log. ``follow`` streams new
+lines as the detection loop writes them and reopens the file when it is
+rotated.
+
+    python log_tail.py                    # last 50 events
+    python log_tail.py -n 200 --type DETECTION --type ERROR
+    python log_tail.py -f --type IDLE     # live, Ctrl+C to stop
+"""
+
+import argparse
+import os
+import time
+
+from log_rotation import parse_line
+
+EVENT_TYPES = ("DETECTION", "IDLE", "TEMP", "ERROR")
+
+
+def matches(line, types):
+    """Whether a log line is an event of one of ``types``; RUN records count as the state they summarize"""
+    if not types:
+        return True
+    event = parse_line(line)
+    if event is None:
+        return False
+    if event.type == "RUN":
+        return event.message.split(" ", 1)[0] in types
+    return event.type in types
+
+
+def tail_lines(path, n=50, types=None, block_size=64 * 1024):
+    """The last ``n`` lines of ``path`` (only events of ``types`` if given), oldest first"""
+    types = set(types or ())
+    found = []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        partial = b""
+        while position > 0 and len(found) < n:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + partial
+            lines = data.split(b"\n")
+            # The first piece may be the end of a line that starts in the previous block
+            partial = lines.pop(0) if position > 0 else b""
+            for raw in reversed(lines):
+                if not raw:
+                    continue
+                line = raw.decode("utf-8", errors="replace")
+                if matches(line, types):
+                    found.append(line)
+                    if len(found) == n:
+                        break
+    return found[::-1]
+
+
+def follow(path, types=None, poll=0.5, from_end=True, stop=None):
+    """Yield lines appended to ``path`` as they are written; survives rotation
+
+    ``stop`` is an optional threading.Event that ends the generator.
+    """
+    types = set(types or ())
+    f = None
+    partial = ""
+    try:
+        while stop is None or not stop.is_set():
+            if f is None:
+                try:
+                    f = open(path, "r", encoding="utf-8", errors="replace")
+                except FileNotFoundError:
+                    time.sleep(poll)
+                    continue
+                if from_end:
+                    f.seek(0, os.SEEK_END)
+                from_end = False  # a rotated-in file is read from its start
+            chunk = f.readline()
+            if chunk:
+                partial += chunk
+                if partial.endswith("\n"):
+                    line, partial = partial.rstrip("\n"), ""
+                    if matches(line, types):
+                        yield line
+                continue
+            # Nothing new: check whether the file was rotated away or truncated
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            if current is None or current.st_ino != os.fstat(f.fileno()).st_ino or current.st_size < f.tell():
+                f.close()
+                f = None
+                continue
+            time.sleep(poll)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the end of the detection log")
+    parser.add_argument("log_file", nargs="?", default="detection_log.txt")
+    parser.add_argument("-n", "--lines", type=int, default=50)
+    parser.add_argument("-f", "--follow", action="store_true", help="keep printing new events")
+    parser.add_argument("--type", action="append", help=f"only these event types ({', '.join(EVENT_TYPES)}, ...)")
+    args = parser.parse_args()
+
+    types = [t.upper() for t in args.type or []]
+    if not os.path.exists(args.log_file):
+        print(f"❌ Log file not found: {args.log_file}")
+        return
+    for line in tail_lines(args.log_file, args.lines, types):
+        print(line)
+    if args.follow:
+        try:
+            for line in follow(args.log_file, types):
+                print(line, flush=True)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,87 @@ Integrated system with camera detection, temperature monitoring, and Flask dashb
 """
 
 import os
+import sqlite3
 import sys
+import threading
 import time
 from datetime import datetime
 
+class _FlushRequest:
+    """Queued behind pending log events; set once they are written"""
+    
+    def __init__(self, stop=False):
+        self.done = threading.Event()
+        self.stop = stop
+
 class DetectionLogger:
-    """Log detection events to file for project reporting"""
+    """Log detection events to file for project reporting
+
+    With ``async_write`` events are queued and a background thread appends
+    them in batches (every ``flush_interval`` seconds or ``flush_size``
+    events) instead of opening the file once per event. ``close()`` - also
+    run at interpreter exit - writes whatever is still queued.
+    
+    In ``transitions`` mode the per-frame states passed to ``log_state`` are
+    only written when they change; each run of repeats ends with one
+    ``RUN: IDLE x 1,532 frames over 61s`` record carrying its exact frame count.
+    
+    With a ``store`` path every event is also written to the indexed
+    EventStore (event_store.py) with typed room/fan/temperature/count fields.
+    
+    ``rotation`` settings (log_rotation.py) rotate the text log by size or
+    age into gzipped segments named after the time range they cover.
+    """
+    
+    MODES = ("every", "transitions")
     
-    def __init__(self, log_file="detection_log.txt"):
+    def __init__(self, log_file="detection_log.txt", async_write=False, flush_interval=1.0,
+                 flush_size=200, echo=True, mode="every", store=None, room=None, rotation=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown logging mode '{mode}' (choose from {', '.join(self.MODES)})")
         self.log_file = log_file
+        self.async_write = async_write
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.echo = echo
+        self.mode = mode
+        self.room = room
+        self.store = None
+        if store:
+            from event_store import EventStore
+            self.store = EventStore(store)
+        self._run = None
+        self._run_lock = threading.Lock()
+        self._append_lock = threading.Lock()
+        self.rotator = None
+        if rotation:
+            from log_rotation import LogRotator
+            self.rotator = LogRotator.from_config(log_file, rotation)
         self.ensure_log_file()
+        
+        self._queue = None
+        self._writer = None
+        if async_write:
+            import atexit
+            import queue
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._write_loop, name="log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+    
+    @classmethod
+    def from_config(cls, config=None, log_file=None):
+        """Logger configured by the ``logging:`` block of config.yaml"""
+        settings = (config or {}).get("logging") or {}
+        return cls(log_file or settings.get("file", "detection_log.txt"),
+                   async_write=settings.get("async", False),
+                   flush_interval=settings.get("flush_interval", 1.0),
+                   flush_size=settings.get("flush_size", 200),
+                   echo=settings.get("echo", True),
+                   mode=settings.get("mode", "every"),
+                   store=settings.get("store"),
+                   room=settings.get("room") or ((config or {}).get("camera") or {}).get("name"),
+                   rotation=settings.get("rotation"))
     
     def ensure_log_file(self):
         """Create log file with header if it doesn't exist"""
@@ -26,31 +97,167 @@ class DetectionLogger:
                 f.write(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
                 f.write("=" * 80 + "\n\n")
     
-    def log_event(self, event_type, message, fan_status=None):
-        """Log an event with timestamp"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = f"[{timestamp}] {event_type}: {message}"
+    @staticmethod
+    def format_entry(timestamp, event_type, message, fan_status=None):
+        """One log line for an event at ``timestamp`` (seconds since the epoch)"""
+        log_entry = f"[{datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')}] {event_type}: {message}"
         
         if fan_status is not None:
             log_entry += f" → Fan: {fan_status}"
         
-        log_entry += "\n"
+        return log_entry + "\n"
+    
+    def log_event(self, event_type, message, fan_status=None, room=None, temperature=None, count=None):
+        """Log an event with timestamp; room, temperature and count are kept as typed fields in the store"""
+        event = (time.time(), event_type, message, fan_status, room or self.room, temperature, count)
+        if self._queue is not None:
+            # Formatting and file I/O happen on the writer thread
+            self._queue.put(event)
+        else:
+            self._write_events([event])
         
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+        if self.echo:
+            print(f"📝 Logged: {event_type} - {message}")
+    
+    def _write_events(self, events):
+        self._append("".join(self.format_entry(*event[:4]) for event in events), events[0][0], events[-1][0])
+        if self.store is not None:
+            try:
+                self.store.add_many([(ts, event_type, message, room, fan, temperature, count)
+                                     for ts, event_type, message, fan, room, temperature, count in events])
+            except sqlite3.Error as e:
+                # The text log already has the events; a locked or broken store must not stop detection
+                print(f"❌ Could not write {self.store.path}: {e}")
+    
+    def log_state(self, event_type, message, fan_status=None, **fields):
+        """Log the state of one frame; in transitions mode repeats of the current state are only counted"""
+        if self.mode != "transitions":
+            self.log_event(event_type, message, fan_status, **fields)
+            return
         
-        print(f"📝 Logged: {event_type} - {message}")
+        now = time.time()
+        key = (event_type, fan_status)
+        with self._run_lock:
+            run = self._run
+            if run is not None and run["key"] == key:
+                run["frames"] += 1
+                run["last"] = now
+                return
+            ended = self._take_run()
+            self._run = {"key": key, "frames": 1, "started": now, "last": now}
+        self._log_run(ended, now)
+        self.log_event(event_type, message, fan_status, **fields)
+    
+    def end_run(self):
+        """Write the record of the current run of repeated states (end of a mode or of occupancy)"""
+        with self._run_lock:
+            ended = self._take_run()
+        self._log_run(ended)
+    
+    def _take_run(self):
+        run, self._run = self._run, None
+        return run
+    
+    def _log_run(self, run, ended=None):
+        # A state seen on a single frame needs no record beyond its transition line
+        if run is None or run["frames"] < 2:
+            return
+        event_type, fan_status = run["key"]
+        duration = (ended or run["last"]) - run["started"]
+        since = datetime.fromtimestamp(run["started"]).strftime('%H:%M:%S')
+        self.log_event("RUN", f"{event_type} x {run['frames']:,} frames over {duration:.0f}s (since {since})",
+                       fan_status, count=run["frames"])
+    
+    def _append(self, text, first_ts=None, last_ts=None):
+        # Written as bytes so the rotator's size matches the file's
+        data = text.encode('utf-8')
+        with self._append_lock:
+            rotator = self.rotator
+            if rotator is not None and rotator.due(len(data), first_ts or time.time()):
+                rotator.rotate()
+                self.ensure_log_file()
+                rotator.size = os.path.getsize(self.log_file)
+            with open(self.log_file, 'ab') as f:
+                f.write(data)
+            if rotator is not None:
+                rotator.written(len(data), first_ts, last_ts)
+    
+    def _write(self, text):
+        """Append raw text, after any events still queued"""
+        if self._queue is not None:
+            self._queue.put(text)
+        else:
+            self._append(text)
+    
+    def _write_loop(self):
+        import queue
+        
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+            
+            request = None
+            if isinstance(item, (tuple, str)):
+                batch.append(item)
+            elif isinstance(item, _FlushRequest):
+                request = item
+            
+            now = time.monotonic()
+            if batch and (request or len(batch) >= self.flush_size or now >= deadline):
+                self._write_batch(batch)
+                batch = []
+            if now >= deadline:
+                deadline = now + self.flush_interval
+            if request:
+                request.done.set()
+                if request.stop:
+                    return
+    
+    def _write_batch(self, batch):
+        """Write queued events and raw text in order, grouping consecutive events"""
+        events = []
+        try:
+            for item in batch + [None]:
+                if isinstance(item, tuple):
+                    events.append(item)
+                    continue
+                if events:
+                    self._write_events(events)
+                    events = []
+                if item is not None:
+                    self._append(item)
+        except (OSError, sqlite3.Error) as e:
+            print(f"❌ Could not write {self.log_file}: {e}")
+    
+    def flush(self, timeout=5.0, stop=False):
+        """Block until everything logged so far is on disk"""
+        if self._writer is None or not self._writer.is_alive():
+            return
+        request = _FlushRequest(stop)
+        self._queue.put(request)
+        request.done.wait(timeout)
+    
+    def close(self):
+        """Write out the open run and queued events and stop the writer thread"""
+        self.end_run()
+        self.flush(stop=True)
+        if self.store is not None and (self._writer is None or not self._writer.is_alive()):
+            self.store.close()
+            self.store = None
     
     def log_summary(self, total_detections, total_fan_on_time, energy_saved):
         """Add summary statistics to log"""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write("\n" + "=" * 80 + "\n")
-            f.write("SESSION SUMMARY\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Total Detections: {total_detections}\n")
-            f.write(f"Fan ON Time: {total_fan_on_time} minutes\n")
-            f.write(f"Energy Saved (estimated): {energy_saved:.2f} kWh\n")
-            f.write("=" * 80 + "\n\n")
+        self._write("\n" + "=" * 80 + "\n"
+                    + "SESSION SUMMARY\n"
+                    + "=" * 80 + "\n"
+                    + f"Total Detections: {total_detections}\n"
+                    + f"Fan ON Time: {total_fan_on_time} minutes\n"
+                    + f"Energy Saved (estimated): {energy_saved:.2f} kWh\n"
+                    + "=" * 80 + "\n\n")
 
 def print_banner():
     """Print welcome banner"""
@@ -74,6 +281,164 @@ def print_menu():
     print("=" * 60)
     print()
 
+def load_settings():
+    """Load config.yaml, falling back to an empty config if unavailable"""
+    try:
+        from utils import load_config
+        return load_config("config.yaml") or {}
+    except (ImportError, OSError):
+        return {}
+
+def build_detector(config, logger, camera=None):
+    """Shared inference backend wrapped with a camera's ROI and input-size settings"""
+    from backends import get_backend
+    from roi import RoiDetector, camera_settings
+    
+    detector = RoiDetector.from_config(get_backend(config), camera or camera_settings(config))
+    if detector.regions:
+        names = ", ".join(region.name for region in detector.regions)
+        logger.log_event("ROI", f"Detecting on {len(detector.regions)} region(s): {names}")
+    return detector
+
+def detection_frames(camera, detector, config, logger):
+    """Yield (frame, detections) pairs, using the threaded pipeline if enabled"""
+    pipeline_config = config.get("pipeline") or {}
+    detect = detector
+    stages = []
+    
+    if (config.get("motion_gate") or {}).get("enabled", False):
+        from motion_gate import GatedDetector, MotionGate
+        detect = GatedDetector(detect, MotionGate.from_config(config))
+        stages.append(("MOTION", detect))
+        logger.log_event("MOTION", "Motion gate enabled - static frames reuse the last detection")
+    
+    governor_config = config.get("governor") or {}
+    if governor_config.get("enabled", False):
+        from governor import GovernedDetector, RateGovernor
+        detect = GovernedDetector(detect, RateGovernor.from_config(config))
+        stages.append(("GOVERNOR", detect))
+        logger.log_event("GOVERNOR", f"CPU budget {100 * detect.governor.cpu_share:.0f}% of one core")
+    
+    log_interval = governor_config.get("log_interval", 30)
+    last_log = time.time()
+    
+    try:
+        if not pipeline_config.get("enabled", False):
+            frames = plain_frames(camera, detect)
+        else:
+            frames = pipeline_frames(camera, detect, pipeline_config, logger)
+        
+        for item in frames:
+            yield item
+            
+            if log_interval and stages and time.time() - last_log >= log_interval:
+                for event_type, stage in stages:
+                    logger.log_event(event_type, stage.format_stats())
+                last_log = time.time()
+    finally:
+        for event_type, stage in stages:
+            logger.log_event(event_type, stage.format_stats())
+
+def plain_frames(camera, detect):
+    """Yield (frame, detections) pairs, capturing and detecting on this thread"""
+    while True:
+        ret, frame = camera.read()
+        if not ret:
+            break
+        yield frame, detect(frame)
+
+def pipeline_frames(camera, detect, pipeline_config, logger):
+    """Yield (frame, detections) pairs from the threaded capture/inference pipeline"""
+    from pipeline import FramePipeline
+    
+    pipeline = FramePipeline(camera, detect, pipeline_config.get("queue_size", 1)).start()
+    logger.log_event("PIPELINE", "Threaded capture/inference pipeline started")
+    stats_interval = pipeline_config.get("stats_interval", 30)
+    last_stats = time.time()
+    
+    try:
+        for packet in pipeline:
+            yield packet.frame, packet.result
+            
+            if stats_interval and time.time() - last_stats >= stats_interval:
+                logger.log_event("PIPELINE", pipeline.format_stats())
+                last_stats = time.time()
+    finally:
+        pipeline.stop()
+        logger.log_event("PIPELINE", f"Stopped - {pipeline.format_stats()}")
+
+def handle_human_frame(detections, fan_controller, logger, detection_count):
+    """Fan control and logging for one frame of Human Detection mode; returns the new detection count"""
+    # Check for human detection
+    human_detected = detections.has_person()
+    
+    if human_detected:
+        detection_count += 1
+        if fan_controller:
+            fan_controller.turn_on()
+            fan_controller.update_last_seen()
+            logger.log_state("DETECTION", f"Human detected (#{detection_count})", "ON", count=detection_count)
+        else:
+            logger.log_state("DETECTION", f"Human detected (#{detection_count}) - (Simulated)", "ON",
+                             count=detection_count)
+        print(f"👤 Human Detected! (#{detection_count}) - Fan: ON")
+    else:
+        if fan_controller:
+            fan_controller.turn_off()
+            logger.log_state("IDLE", "No human detected", "OFF")
+        else:
+            # Nothing is logged per frame without a fan, but the detection run is over
+            logger.end_run()
+    
+    return detection_count
+
+def handle_combined_frame(detections, current_temp, fan, config, logger, detection_count):
+    """Fan control and logging for one frame of Combined mode; returns the new detection count"""
+    human_detected = detections.has_person()
+    
+    # Logic: Fan ON if human detected AND temperature above threshold
+    if human_detected and current_temp > config["temp_threshold"]:
+        detection_count += 1
+        fan.turn_on()
+        fan.update_last_seen()
+        logger.log_state("DETECTION", 
+            f"Human detected (#{detection_count}) at {current_temp:.1f}°C (above {config['temp_threshold']}°C)", 
+            "ON", count=detection_count, temperature=current_temp)
+        print(f"👤 Human Detected! 🌡️ Temp: {current_temp:.1f}°C - Fan: ON")
+    else:
+        if not human_detected:
+            fan.turn_off()
+            logger.log_state("IDLE", "No human detected", "OFF", temperature=current_temp)
+        elif current_temp <= config["temp_threshold"]:
+            fan.turn_off()
+            logger.log_state("TEMP", f"Temp {current_temp:.1f}°C below threshold", "OFF", temperature=current_temp)
+    
+    return detection_count
+
+def render_human_frame(frame, detections, renderer):
+    """Annotated display frame for Human Detection mode (drawn into the renderer's buffer)"""
+    return renderer.render(frame, detections)
+
+def render_combined_frame(frame, detections, current_temp, threshold, renderer):
+    """Annotated display frame with the temperature banner for Combined mode"""
+    from overlay import temperature_banner
+    return renderer.render(frame, detections, temperature_banner(current_temp, threshold))
+
+def end_session(camera, scheduler, bank, stats, logger):
+    """Release the camera and fan outputs and write the session summary"""
+    import cv2
+    
+    camera.release()
+    # Anything not created yet when setup failed is None
+    if scheduler is not None:
+        scheduler.close()
+    if bank is not None:
+        bank.close()
+    logger.end_run()
+    if stats is not None:
+        stats.finish(logger)
+    cv2.destroyAllWindows()
+
 def run_human_detection(logger):
     """Run option 1: Camera-based human detection only"""
     print("\n🎥 Starting Human Detection Mode...")
@@ -82,13 +447,20 @@ def run_human_detection(logger):
     
     try:
         import cv2
-        import torch
+        from actuator_bank import ActuatorBank
+        from camera import open_source
+        from overlay import OverlayRenderer
+        from fan_scheduler import FanScheduler
+        from roi import camera_settings
+        from session_stats import SessionStats
+        
+        config = load_settings()
         
         print("⏳ Loading YOLO model...")
-        model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-        logger.log_event("MODEL", "YOLO model loaded successfully")
+        detector = build_detector(config, logger)
+        logger.log_event("MODEL", f"YOLO model loaded successfully - {detector.startup}")
         
-        camera = cv2.VideoCapture(0)
+        camera = open_source(camera_settings(config).get("source", 0))
         if not camera.isOpened():
             print("❌ Error: Could not open camera")
             logger.log_event("ERROR", "Camera initialization failed")
@@ -98,53 +470,39 @@ def run_human_detection(logger):
         print("✅ Camera initialized\n")
         
         fan_controller = None
+        scheduler = bank = stats = None
         try:
-            from fan_controller import FanController
-            from utils import load_config
-            config = load_config("config.yaml")
-            fan_controller = FanController(config["gpio_pin"], config["off_delay"])
-            print("✅ Fan controller initialized\n")
-        except ImportError:
-            print("⚠️ Fan controller not available (using simulation mode)\n")
-        
-        print("🔍 Detection Active - Press 'Q' to quit\n")
-        detection_count = 0
-        
-        while True:
-            ret, frame = camera.read()
-            if not ret:
-                break
-            
-            # Run detection
-            results = model(frame)
-            detections = results.pandas().xyxy[0]
-            
-            # Check for human detection
-            human_detected = any(d['name'] == 'person' for _, d in detections.iterrows())
-            
-            if human_detected:
-                detection_count += 1
-                if fan_controller:
-                    fan_controller.turn_on()
-                    fan_controller.update_last_seen()
-                    logger.log_event("DETECTION", f"Human detected (#{detection_count})", "ON")
-                else:
-                    logger.log_event("DETECTION", f"Human detected (#{detection_count}) - (Simulated)", "ON")
-                print(f"👤 Human Detected! (#{detection_count}) - Fan: ON")
-            else:
-                if fan_controller:
-                    fan_controller.turn_off()
-                    logger.log_event("IDLE", "No human detected", "OFF")
+            bank = ActuatorBank.from_config(config)
+            scheduler = FanScheduler()
+            try:
+                from fan_controller import FanController
+                # The scheduler switches the fan off on time even if detection stalls
+                fan_controller = scheduler.add(FanController(config["gpio_pin"], config["off_delay"], bank))
+                print("✅ Fan controller initialized\n")
+            except (ImportError, KeyError):
+                print("⚠️ Fan controller not available (using simulation mode)\n")
             
-            # Display frame
-            cv2.imshow("Smart Energy System - Human Detection", results.render()[0])
+            print("🔍 Detection Active - Press 'Q' to quit, 'S' for session stats\n")
+            detection_count = 0
+            renderer = OverlayRenderer()
+            stats = SessionStats.from_config(config).attach(fan_controller)
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                print("\n⏹️  Stopping detection...")
-                break
-        
-        camera.release()
-        cv2.destroyAllWindows()
+            for frame, detections in detection_frames(camera, detector, config, logger):
+                detection_count = handle_human_frame(detections, fan_controller, logger, detection_count)
+                stats.record_frame(detections.has_person())
+                
+                # Display frame
+                cv2.imshow("Smart Energy System - Human Detection", render_human_frame(frame, detections, renderer))
+                
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('s'):
+                    print(f"📈 {stats.format_stats()}")
+                if key == ord('q'):
+                    print("\n⏹️  Stopping detection...")
+                    break
+        finally:
+            # Also on errors and Ctrl+C: free the camera and GPIO, write the session summary
+            end_session(camera, scheduler, bank, stats, logger)
         
         logger.log_event("SYSTEM", f"Human Detection mode ended. Total detections: {detection_count}")
         print(f"\n✅ Session complete! Total detections: {detection_count}")
@@ -164,74 +522,64 @@ def run_combined_mode(logger):
     
     try:
         import cv2
-        import torch
+        from actuator_bank import ActuatorBank
+        from camera import open_source
+        from overlay import OverlayRenderer
+        from fan_scheduler import FanScheduler
+        from roi import camera_settings
+        from session_stats import SessionStats
         from temp_sensor import TemperatureSensor
         from fan_controller import FanController
         from utils import load_config
         
+        config = load_config("config.yaml")
+        
         print("⏳ Loading YOLO model...")
-        model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
+        detector = build_detector(config, logger)
         
-        config = load_config("config.yaml")
         temp_sensor = TemperatureSensor(config["temp_threshold"])
-        fan = FanController(config["gpio_pin"], config["off_delay"])
         
-        logger.log_event("MODEL", "YOLO model and sensors loaded successfully")
+        logger.log_event("MODEL", f"YOLO model and sensors loaded successfully - {detector.startup}")
         
-        camera = cv2.VideoCapture(0)
+        camera = open_source(camera_settings(config).get("source", 0))
         if not camera.isOpened():
             print("❌ Error: Could not open camera")
             logger.log_event("ERROR", "Camera initialization failed")
             return
         
-        print("✅ Camera and sensors initialized\n")
-        logger.log_event("CAMERA", "Camera opened successfully")
-        
-        print("🔍 Detection Active - Press 'Q' to quit\n")
-        detection_count = 0
-        
-        while True:
-            ret, frame = camera.read()
-            if not ret:
-                break
-            
-            # Read temperature
-            current_temp = temp_sensor.read_temp()
-            
-            # Run detection
-            results = model(frame)
-            detections = results.pandas().xyxy[0]
-            human_detected = any(d['name'] == 'person' for _, d in detections.iterrows())
+        scheduler = bank = stats = None
+        try:
+            bank = ActuatorBank.from_config(config)
+            scheduler = FanScheduler()
+            fan = scheduler.add(FanController(config["gpio_pin"], config["off_delay"], bank))
             
-            # Logic: Fan ON if human detected AND temperature above threshold
-            if human_detected and current_temp > config["temp_threshold"]:
-                detection_count += 1
-                fan.turn_on()
-                fan.update_last_seen()
-                logger.log_event("DETECTION", 
-                    f"Human detected (#{detection_count}) at {current_temp:.1f}°C (above {config['temp_threshold']}°C)", 
-                    "ON")
-                print(f"👤 Human Detected! 🌡️ Temp: {current_temp:.1f}°C - Fan: ON")
-            else:
-                if not human_detected:
-                    fan.turn_off()
-                    logger.log_event("IDLE", "No human detected", "OFF")
-                elif current_temp <= config["temp_threshold"]:
-                    fan.turn_off()
-                    logger.log_event("TEMP", f"Temp {current_temp:.1f}°C below threshold", "OFF")
+            print("✅ Camera and sensors initialized\n")
+            logger.log_event("CAMERA", "Camera opened successfully")
             
-            # Display frame with temperature
-            display_text = f"Temp: {current_temp:.1f}°C | Threshold: {config['temp_threshold']}°C"
-            cv2.putText(results.render()[0], display_text, (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.imshow("Smart Energy System - Combined Detection", results.render()[0])
+            print("🔍 Detection Active - Press 'Q' to quit, 'S' for session stats\n")
+            detection_count = 0
+            renderer = OverlayRenderer()
+            stats = SessionStats.from_config(config).attach(fan)
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                print("\n⏹️  Stopping detection...")
-                break
-        
-        camera.release()
-        cv2.destroyAllWindows()
+            for frame, detections in detection_frames(camera, detector, config, logger):
+                # Read temperature
+                current_temp = temp_sensor.read_temp()
+                
+                detection_count = handle_combined_frame(detections, current_temp, fan, config, logger, detection_count)
+                stats.record_frame(detections.has_person())
+                
+                # Display frame with temperature
+                cv2.imshow("Smart Energy System - Combined Detection",
+                           render_combined_frame(frame, detections, current_temp, config["temp_threshold"], renderer))
+                
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('s'):
+                    print(f"📈 {stats.format_stats()}")
+                if key == ord('q'):
+                    print("\n⏹️  Stopping detection...")
+                    break
+        finally:
+            end_session(camera, scheduler, bank, stats, logger)
         
         logger.log_event("SYSTEM", f"Combined Detection mode ended. Total detections: {detection_count}")
         print(f"\n✅ Session complete! Total detections: {detection_count}")
@@ -282,25 +630,36 @@ def run_streamlit_dashboard(logger):
         logger.log_event("ERROR", f"Streamlit dashboard error: {str(e)}")
 
 def view_logs(logger):
-    """View detection logs"""
+    """View detection logs: the last 50 events, optionally filtered and followed live"""
+    from log_tail import EVENT_TYPES, follow, tail_lines
+    
     print("\n📊 Detection Logs:")
     print("=" * 60)
+    logger.flush()
+    
+    answer = input(f"Filter by type ({'/'.join(EVENT_TYPES)}, comma separated, Enter = all): ")
+    types = [t.strip().upper() for t in answer.split(",") if t.strip()]
     
     try:
-        with open(logger.log_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        if len(lines) > 50:
-            # Show last 50 lines
-            print("(Showing last 50 lines)\n")
-            for line in lines[-50:]:
-                print(line.rstrip())
-        else:
-            for line in lines:
-                print(line.rstrip())
+        # Reads backwards from the end, so this is fast on any log size
+        lines = tail_lines(logger.log_file, 50, types)
+        print(f"(Showing last {len(lines)} {'/'.join(types) + ' ' if types else ''}lines)\n")
+        for line in lines:
+            print(line)
         
         print("\n" + "=" * 60)
         print(f"📁 Log file: {os.path.abspath(logger.log_file)}")
+        if logger.store is not None:
+            print(f"🗄️  Event store: {os.path.abspath(logger.store.path)} (python event_store.py query --help)")
+        
+        if input("\nFollow new events live? (y/N): ").strip().lower() == "y":
+            print("👀 Following - press Ctrl+C to stop\n")
+            try:
+                for line in follow(logger.log_file, types):
+                    print(line, flush=True)
+            except KeyboardInterrupt:
+                print("\n⏹️  Stopped following")
+            return
         
     except FileNotFoundError:
         print("❌ Log file not found")
@@ -311,11 +670,19 @@ def view_logs(logger):
 
 def main():
     """Main entry point"""
-    logger = DetectionLogger()
+    logger = DetectionLogger.from_config(load_settings())
     
     # Print welcome banner
     print_banner()
     
+    try:
+        run_menu(logger)
+    finally:
+        # Queued log events reach the file even after Ctrl+C
+        logger.close()
+
+def run_menu(logger):
+    """Menu loop until the user exits"""
     while True:
         print_menu()
         
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Process-wide YOLO model registry with an offline weight cache.
+
+Models are loaded from a local cache directory (a copy of the YOLOv5 hub
+repo plus the ``.pt`` weights), so starting a mode needs no network or hub
+resolution. Each model is loaded once per process, shared by every mode,
+and warmed up with a dummy frame so the first real frame is not slow.
+
+Populate the cache once (needs network):
+
+    python model_registry.py --download
+
+Loading fails fast with that hint when the cache is empty, unless
+``model.allow_download`` opts in to fetching it on first start.
+"""
+
+import argparse
+import os
+import shutil
+import threading
+import time
+
+DEFAULT_MODEL = "yolov5s"
+DEFAULT_CACHE_DIR = "models"
+HUB_REPO = "ultralytics/yolov5"
+
+_models = {}
+_startup = {}
+_lock = threading.Lock()
+
+
+def model_settings(config=None):
+    settings = (config or {}).get("model") or {}
+    return {
+        "name": settings.get("name", DEFAULT_MODEL),
+        "cache_dir": settings.get("cache_dir", DEFAULT_CACHE_DIR),
+        "allow_download": settings.get("allow_download", False),
+        "warmup_size": settings.get("warmup_size", 640),
+    }
+
+
+def cache_paths(name=DEFAULT_MODEL, cache_dir=DEFAULT_CACHE_DIR):
+    """(repo_dir, weights_path) for a model in the cache"""
+    return os.path.join(cache_dir, "yolov5"), os.path.join(cache_dir, f"{name}.pt")
+
+
+def is_cached(name=DEFAULT_MODEL, cache_dir=DEFAULT_CACHE_DIR):
+    repo_dir, weights = cache_paths(name, cache_dir)
+    return os.path.isfile(os.path.join(repo_dir, "hubconf.py")) and os.path.isfile(weights)
+
+
+def download(name=DEFAULT_MODEL, cache_dir=DEFAULT_CACHE_DIR):
+    """Fetch the hub repo and weights into the cache (the only step that needs network)"""
+    import torch
+
+    repo_dir, weights = cache_paths(name, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    hub_dir = os.path.abspath(os.path.join(cache_dir, "hub"))
+    torch.hub.set_dir(hub_dir)
+    torch.hub.load(HUB_REPO, name, pretrained=True)
+
+    # torch.hub checks the repo out as <owner>_<repo>_<branch>
+    checkout = next(os.path.join(hub_dir, d) for d in os.listdir(hub_dir)
+                    if d.startswith("ultralytics_yolov5"))
+    if not os.path.isdir(repo_dir):
+        shutil.copytree(checkout, repo_dir)
+    # YOLOv5 downloads weights into the working directory
+    if not os.path.isfile(weights):
+        shutil.move(f"{name}.pt", weights)
+    shutil.rmtree(hub_dir, ignore_errors=True)
+    return weights
+
+
+def load_local(name=DEFAULT_MODEL, cache_dir=DEFAULT_CACHE_DIR):
+    """Load a model from the cache without touching the network"""
+    import torch
+
+    if not is_cached(name, cache_dir):
+        raise FileNotFoundError(
+            f"{name} not found in '{cache_dir}'. Run: python model_registry.py --download")
+    # Keep YOLOv5 from pip-installing or checking for updates at load time
+    os.environ.setdefault("YOLOv5_AUTOINSTALL", "false")
+    os.environ.setdefault("YOLOv5_VERBOSE", "false")
+    repo_dir, weights = cache_paths(name, cache_dir)
+    return torch.hub.load(repo_dir, "custom", path=weights, source="local")
+
+
+def warm_up(model, size=640, runs=1):
+    """Run dummy inferences so the first real frame does not pay for lazy initialization"""
+    import numpy as np
+
+    dummy = np.zeros((size, size, 3), dtype=np.uint8)
+    for _ in range(runs):
+        model(dummy)
+
+
+def get_model(config=None):
+    """The shared model for this process, loading and warming it up on first use"""
+    settings = model_settings(config)
+    key = (settings["name"], os.path.abspath(settings["cache_dir"]))
+
+    with _lock:
+        if key in _models:
+            return _models[key]
+
+        started = time.perf_counter()
+        downloaded = False
+        if not is_cached(settings["name"], settings["cache_dir"]) and settings["allow_download"]:
+            download(settings["name"], settings["cache_dir"])
+            downloaded = True
+        loaded = time.perf_counter()
+        model = load_local(settings["name"], settings["cache_dir"])
+        ready = time.perf_counter()
+        if settings["warmup_size"]:
+            warm_up(model, settings["warmup_size"])
+        warmed = time.perf_counter()
+
+        _models[key] = model
+        _startup[key] = {
+            "model": settings["name"],
+            "download_s": loaded - started if downloaded else 0.0,
+            "load_s": ready - loaded,
+            "warmup_s": warmed - ready,
+            "total_s": warmed - started,
+        }
+        return model
+
+
+def release_model(config=None):
+    """Drop the shared model from the registry; it is freed once nothing else holds it"""
+    settings = model_settings(config)
+    with _lock:
+        _models.pop((settings["name"], os.path.abspath(settings["cache_dir"])), None)
+
+
+def startup_report(config=None):
+    """Timing of the shared model's startup, or None if it has not been loaded"""
+    settings = model_settings(config)
+    return _startup.get((settings["name"], os.path.abspath(settings["cache_dir"])))
+
+
+def format_startup(config=None):
+    report = startup_report(config)
+    if report is None:
+        return "model not loaded"
+    text = (f"{report['model']} ready in {report['total_s']:.2f}s "
+            f"(load {report['load_s']:.2f}s, warm-up {report['warmup_s']:.2f}s)")
+    if report["download_s"]:
+        text += f", downloaded to cache in {report['download_s']:.1f}s"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local YOLO model cache")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--download", action="store_true", help="populate the cache from the hub")
+    args = parser.parse_args()
+
+    from utils import load_config
+    config = load_config(args.config) or {}
+    settings = model_settings(config)
+
+    if args.download:
+        print(f"⏳ Downloading {settings['name']} into {settings['cache_dir']}/ ...")
+        download(settings["name"], settings["cache_dir"])
+
+    get_model(config)
+    print(f"✅ {format_startup(config)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Motion gate: skip YOLO inference when the scene has not changed.
+
+A cheap check on a downscaled grayscale copy of the frame decides whether
+the room changed enough since the last inference to be worth another
+forward pass. If not, the previous detection is reused. A forced refresh
+interval bounds how long a result can be reused.
+"""
+
+import time
+
+
+class MotionGate:
+    """Decides per frame whether the scene changed enough to run detection.
+
+    ``method`` is ``"diff"`` (absolute difference against the frame used for
+    the last inference) or ``"mog2"`` (OpenCV background subtraction).
+    """
+
+    def __init__(self, method="diff", downscale_width=160, pixel_threshold=25,
+                 min_changed_ratio=0.01, refresh_interval=5.0):
+        self.method = method
+        self.downscale_width = downscale_width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.refresh_interval = refresh_interval
+        self.reference = None
+        self.last_refresh = 0.0
+        self.last_ratio = 0.0
+        self._subtractor = None
+
+    @classmethod
+    def from_config(cls, config):
+        settings = (config or {}).get("motion_gate") or {}
+        return cls(
+            method=settings.get("method", "diff"),
+            downscale_width=settings.get("downscale_width", 160),
+            pixel_threshold=settings.get("pixel_threshold", 25),
+            min_changed_ratio=settings.get("min_changed_ratio", 0.01),
+            refresh_interval=settings.get("refresh_interval", 5.0),
+        )
+
+    def _prepare(self, frame):
+        import cv2
+        height, width = frame.shape[:2]
+        if width > self.downscale_width:
+            scale = self.downscale_width / width
+            frame = cv2.resize(frame, (self.downscale_width, max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def changed_ratio(self, small):
+        """Fraction of pixels that changed, on an already downscaled gray frame"""
+        import cv2
+        if self.method == "mog2":
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(
+                    history=300, varThreshold=self.pixel_threshold, detectShadows=False)
+            mask = self._subtractor.apply(small)
+            return cv2.countNonZero(mask) / mask.size
+        if self.reference is None or self.reference.shape != small.shape:
+            return 1.0
+        diff = cv2.absdiff(small, self.reference)
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) / mask.size
+
+    def should_infer(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        small = self._prepare(frame)
+        self.last_ratio = self.changed_ratio(small)
+
+        due = self.refresh_interval and now - self.last_refresh >= self.refresh_interval
+        if due or self.reference is None or self.last_ratio >= self.min_changed_ratio:
+            self.reference = small
+            self.last_refresh = now
+            return True
+        return False
+
+
+class GatedDetector:
+    """Wraps a detect callable so unchanged frames reuse the last result"""
+
+    def __init__(self, detect, gate):
+        self.detect = detect
+        self.gate = gate
+        self.last_result = None
+        self.frames = 0
+        self.inferences = 0
+        self.gate_cpu = 0.0
+        self.inference_cpu = 0.0
+
+    def __call__(self, frame):
+        self.frames += 1
+        # Process CPU time, so inference on the runtime's worker threads is counted too
+        start = time.process_time()
+        run = self.gate.should_infer(frame) or self.last_result is None
+        gated = time.process_time()
+        self.gate_cpu += gated - start
+
+        if run:
+            self.last_result = self.detect(frame)
+            self.inferences += 1
+            self.inference_cpu += time.process_time() - gated
+        return self.last_result
+
+    def stats(self):
+        skipped = self.frames - self.inferences
+        avg_inference = self.inference_cpu / self.inferences if self.inferences else 0.0
+        return {
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "skipped": skipped,
+            "skip_ratio": skipped / self.frames if self.frames else 0.0,
+            "avg_inference_ms": 1000.0 * avg_inference,
+            "avg_gate_ms": 1000.0 * self.gate_cpu / self.frames if self.frames else 0.0,
+            "cpu_saved_s": max(0.0, skipped * avg_inference - self.gate_cpu),
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (f"{stats['skipped']}/{stats['frames']} frames skipped "
+                f"({100 * stats['skip_ratio']:.0f}%), ~{stats['cpu_saved_s']:.1f}s CPU saved "
+                f"(gate {stats['avg_gate_ms']:.2f} ms vs inference {stats['avg_inference_ms']:.1f} ms)")
@@ -0,0 +1,114 @@
+"""
+Occupancy state for the web front ends, derived from the video feed.
+
+OccupancyTracker listens to the frames a StreamHub publishes and keeps the
+current "is someone there, how many, how confident" state plus a bounded
+history of changes. It reuses the detections of the /video_feed pass, so
+serving /api/occupancy never runs the model again.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+
+def occupancy_state(detections):
+    """Occupancy summary of one frame's Detections"""
+    return {
+        "occupied": detections.has_person(),
+        "person_count": detections.person_count(),
+        "confidence": round(detections.max_confidence(), 3),
+    }
+
+
+def format_sse(event, data):
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class OccupancyTracker:
+    """Current occupancy, a change counter viewers can wait on and the recent change history"""
+
+    def __init__(self, history_size=1000):
+        self._cond = threading.Condition()
+        self.state = None
+        self.version = 0  # bumped only when occupied / person_count change
+        self.changes = deque(maxlen=history_size)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls((config.get("flask") or {}).get("occupancy_history", 1000))
+
+    def attach(self, hub):
+        hub.add_listener(self.on_frame)
+        return self
+
+    def on_frame(self, version, frame):
+        """StreamHub listener; runs on the producer thread"""
+        if frame.occupancy is not None:
+            state = {key: frame.occupancy[key] for key in ("occupied", "person_count", "confidence")}
+        elif frame.detections is not None:
+            state = occupancy_state(frame.detections)
+        else:
+            return
+        self.update(state, frame.timestamp)
+
+    def update(self, state, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._cond:
+            previous = self.state
+            changed = previous is None or (state["occupied"], state["person_count"]) != (
+                previous["occupied"], previous["person_count"])
+            since = timestamp if changed else previous["since"]
+            self.state = dict(state, ts=timestamp, since=since)
+            if changed:
+                self.version += 1
+                self.changes.append(dict(self.state))
+                self._cond.notify_all()
+
+    def current(self):
+        """Latest state with its age in seconds, or None before the first frame"""
+        with self._cond:
+            if self.state is None:
+                return None
+            return dict(self.state, age=round(time.time() - self.state["ts"], 3))
+
+    def wait_change(self, after, timeout=5.0):
+        """(version, state) once the state differs from version ``after``, else None"""
+        with self._cond:
+            if self.version == after:
+                self._cond.wait(timeout)
+            if self.version == after or self.state is None:
+                return None
+            return self.version, dict(self.state)
+
+    def history(self, since=None, until=None, limit=None):
+        """Recorded changes in time order, optionally limited to [since, until] and the last ``limit``"""
+        with self._cond:
+            changes = [change for change in self.changes
+                       if (since is None or change["ts"] >= since) and (until is None or change["ts"] <= until)]
+        return changes[-limit:] if limit else changes
+
+    def events(self, hub, heartbeat=5.0):
+        """Yield SSE messages: every change, and the current state again after ``heartbeat`` quiet seconds
+
+        The caller counts as a hub viewer, so a lazy hub keeps detecting while anyone listens.
+        """
+        hub.join()
+        try:
+            version = self.version
+            current = self.current()
+            if current is not None:
+                yield format_sse("occupancy", current)
+            while True:
+                item = self.wait_change(version, heartbeat)
+                if item is not None:
+                    version, state = item
+                    yield format_sse("occupancy", state)
+                    continue
+                if not hub.keep_waiting():
+                    break
+                yield format_sse("heartbeat", self.current() or {"ts": time.time()})
+        finally:
+            hub.leave()
@@ -0,0 +1,55 @@
+"""
+Detection overlay drawn straight from the Detections arrays.
+
+OverlayRenderer draws boxes, labels and an optional banner line (the
+temperature readout in Combined mode) either in place on a frame the caller
+owns, or into one reusable buffer, so rendering a frame allocates no new
+image. The CLI display, the Flask stream and the detection service all use
+it.
+"""
+
+import numpy as np
+
+GREEN = (0, 255, 0)
+
+
+def temperature_banner(current_temp, threshold):
+    return f"Temp: {current_temp:.1f}°C | Threshold: {threshold}°C"
+
+
+class OverlayRenderer:
+    """Draws detections onto a frame buffer that is reused from frame to frame"""
+
+    def __init__(self, color=GREEN, thickness=2, font_scale=0.5):
+        self.color = color
+        self.thickness = thickness
+        self.font_scale = font_scale
+        self.buffer = None
+        self.allocations = 0  # times the buffer had to be (re)allocated
+
+    def _target(self, frame):
+        if self.buffer is None or self.buffer.shape != frame.shape or self.buffer.dtype != frame.dtype:
+            self.buffer = np.empty_like(frame)
+            self.allocations += 1
+        np.copyto(self.buffer, frame)
+        return self.buffer
+
+    def render(self, frame, detections, banner=None, in_place=False):
+        """Annotated image: ``frame`` itself when ``in_place``, else the renderer's buffer
+
+        The buffer is overwritten by the next call; copy it if it must outlive the frame.
+        """
+        import cv2
+
+        image = frame if in_place else self._target(frame)
+        if len(detections):
+            names = detections.names
+            boxes = detections.boxes.astype(np.int32).tolist()
+            for (x1, y1, x2, y2), conf, cls in zip(boxes, detections.confidences.tolist(),
+                                                   detections.class_ids.tolist()):
+                cv2.rectangle(image, (x1, y1), (x2, y2), self.color, self.thickness)
+                cv2.putText(image, f"{names.get(cls, cls)} {conf:.2f}", (x1, max(y1 - 5, 10)),
+                            cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, self.color, 1)
+        if banner:
+            cv2.putText(image, banner, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.color, 2)
+        return image
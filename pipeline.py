@@ -0,0 +1,230 @@
+"""
+Threaded frame pipeline: capture -> inference -> consumer.
+
+The camera is drained by its own thread so the detector always works on the
+newest frame instead of whatever has been sitting in the driver buffer.
+Stages are joined by small bounded queues that drop the oldest item when
+full, so a slow stage never makes the frames it sees older.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, int(maxsize))
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next item, or None on timeout / once closed and drained"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed and not self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class StageStats:
+    """Throughput and busy time of one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.busy = 0.0
+        self.started = None
+        self.last = None
+
+    def record(self, duration):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now - duration
+        self.last = now
+        self.count += 1
+        self.busy += duration
+
+    def snapshot(self):
+        elapsed = (self.last - self.started) if self.count else 0.0
+        return {
+            "frames": self.count,
+            "fps": self.count / elapsed if elapsed > 0 else 0.0,
+            "avg_ms": 1000.0 * self.busy / self.count if self.count else 0.0,
+        }
+
+
+class FramePacket:
+    """A frame travelling through the pipeline"""
+
+    __slots__ = ("frame_id", "frame", "captured_at", "result", "inferred_at")
+
+    def __init__(self, frame_id, frame, captured_at):
+        self.frame_id = frame_id
+        self.frame = frame
+        self.captured_at = captured_at
+        self.result = None
+        self.inferred_at = None
+
+    @property
+    def age(self):
+        """Seconds since the frame was captured"""
+        return time.perf_counter() - self.captured_at
+
+
+class FramePipeline:
+    """Runs capture and inference on background threads.
+
+    ``source`` follows the ``cv2.VideoCapture`` interface (see camera.py) and
+    ``infer`` is called with a frame and returns whatever the consumer needs
+    (for example the YOLO results). The caller consumes finished packets with
+    ``get()`` on its own thread, which keeps ``cv2.imshow`` on the main thread.
+    """
+
+    def __init__(self, source, infer, queue_size=1):
+        self.source = source
+        self.infer = infer
+        self.frames = DropOldestQueue(queue_size)
+        self.results = DropOldestQueue(queue_size)
+        self.capture_stats = StageStats("capture")
+        self.inference_stats = StageStats("inference")
+        self.consumer_stats = StageStats("consumer")
+        self._ages = deque(maxlen=500)
+        self._stop = threading.Event()
+        self._threads = []
+        self.error = None
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _capture_loop(self):
+        frame_id = 0
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ret, frame = self.source.read()
+                if not ret:
+                    break
+                now = time.perf_counter()
+                self.capture_stats.record(now - start)
+                frame_id += 1
+                self.frames.put(FramePacket(frame_id, frame, now))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.frames.close()
+
+    def _inference_loop(self):
+        try:
+            while not self._stop.is_set():
+                packet = self.frames.get(timeout=0.1)
+                if packet is None:
+                    if self.frames.closed:
+                        break
+                    continue
+                start = time.perf_counter()
+                packet.result = self.infer(packet.frame)
+                packet.inferred_at = time.perf_counter()
+                self.inference_stats.record(packet.inferred_at - start)
+                self.results.put(packet)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.results.close()
+
+    def get(self, timeout=0.1):
+        """Next inferred packet, or None if nothing is ready yet"""
+        return self.results.get(timeout)
+
+    def task_done(self, packet, started):
+        """Record that the consumer finished ``packet`` (started at ``started``)"""
+        now = time.perf_counter()
+        self.consumer_stats.record(now - started)
+        self._ages.append(now - packet.captured_at)
+
+    @property
+    def finished(self):
+        """True once the source is exhausted and every result was consumed"""
+        return self.results.closed
+
+    def __iter__(self):
+        """Yield packets until the source ends or ``stop()`` is called"""
+        while not self._stop.is_set():
+            packet = self.get()
+            if packet is None:
+                if self.finished:
+                    break
+                continue
+            started = time.perf_counter()
+            yield packet
+            self.task_done(packet, started)
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        self._stop.set()
+        self.frames.close()
+        self.results.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def stats(self):
+        ages = sorted(self._ages)
+        frame_age = {}
+        if ages:
+            frame_age = {
+                "avg_ms": 1000.0 * sum(ages) / len(ages),
+                "p50_ms": 1000.0 * ages[len(ages) // 2],
+                "max_ms": 1000.0 * ages[-1],
+            }
+        return {
+            "capture": self.capture_stats.snapshot(),
+            "inference": self.inference_stats.snapshot(),
+            "consumer": self.consumer_stats.snapshot(),
+            "dropped_before_inference": self.frames.dropped,
+            "dropped_before_consumer": self.results.dropped,
+            "frame_age": frame_age,
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        parts = [
+            f"{name} {stats[name]['fps']:.1f} fps ({stats[name]['avg_ms']:.1f} ms)"
+            for name in ("capture", "inference", "consumer")
+        ]
+        if stats["frame_age"]:
+            parts.append(f"frame age avg {stats['frame_age']['avg_ms']:.0f} ms"
+                         f" / max {stats['frame_age']['max_ms']:.0f} ms")
+        parts.append(f"dropped {stats['dropped_before_inference']}+{stats['dropped_before_consumer']}")
+        return " | ".join(parts)
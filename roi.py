@@ -0,0 +1,193 @@
+"""
+Region-of-interest cropping per camera.
+
+Instead of sending the full frame to the detector, only the configured
+regions (desk, sofa, doorway, ...) are cropped and detected, at the
+camera's own inference size. Boxes are mapped back to full-frame
+coordinates so drawing and the fan decision work unchanged.
+
+config.yaml::
+
+    camera:
+      source: 0
+      img_size: 320
+      rois:
+        - name: desk
+          rect: [100, 80, 320, 240]          # x, y, width, height
+        - name: doorway
+          polygon: [[500, 0], [640, 0], [640, 480], [520, 480]]
+"""
+
+import numpy as np
+
+from backends import nms
+from detections import Detections
+
+
+class Region:
+    """A rectangle or polygon in full-frame pixel coordinates"""
+
+    def __init__(self, name, rect=None, polygon=None):
+        self.name = name
+        self.polygon = None
+        if polygon is not None:
+            self.polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+            x1, y1 = self.polygon.min(0)
+            x2, y2 = self.polygon.max(0)
+            rect = (x1, y1, x2 - x1, y2 - y1)
+        if rect is None:
+            raise ValueError(f"ROI '{name}' needs either 'rect' or 'polygon'")
+        self.rect = tuple(int(round(v)) for v in rect)
+
+    @classmethod
+    def from_config(cls, index, settings):
+        return cls(settings.get("name", f"roi{index}"), settings.get("rect"), settings.get("polygon"))
+
+    def bounds(self, shape):
+        """Crop bounds clipped to a frame of ``shape``"""
+        height, width = shape[:2]
+        x, y, w, h = self.rect
+        x1, y1 = max(0, x), max(0, y)
+        return x1, y1, min(width, x + w), min(height, y + h)
+
+    def contains(self, points):
+        """Boolean mask of which ``N x 2`` points fall inside the polygon (even-odd rule)"""
+        if self.polygon is None:
+            return np.ones(len(points), dtype=bool)
+        px, py = points[:, 0:1], points[:, 1:2]
+        x1, y1 = self.polygon[:, 0], self.polygon[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        crosses = (y1 > py) != (y2 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_at = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+        return (crosses & (px < x_at)).sum(1) % 2 == 1
+
+
+def camera_settings(config, name=None):
+    """Settings for one camera: the ``cameras:`` entry called ``name``, else the ``camera:`` block"""
+    config = config or {}
+    if name is not None:
+        for camera in config.get("cameras") or []:
+            if camera.get("name") == name:
+                return camera
+    return config.get("camera") or {}
+
+
+class RoiDetector:
+    """Runs a backend on the configured regions of each frame only"""
+
+    def __init__(self, backend, regions=None, img_size=None, iou=0.5):
+        self.backend = backend
+        self.regions = list(regions or [])
+        self.img_size = img_size
+        self.iou = iou
+
+    @classmethod
+    def from_config(cls, backend, camera):
+        regions = [Region.from_config(i, r) for i, r in enumerate(camera.get("rois") or [])]
+        return cls(backend, regions, camera.get("img_size"))
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    @property
+    def startup(self):
+        return self.backend.startup
+
+    def __call__(self, frame):
+        return self.detect(frame)
+
+    def detect(self, frame):
+        if not self.regions:
+            return self.backend.detect_batch([frame], size=self.img_size)[0]
+        crops, placements = self.crops(frame)
+        if not crops:
+            return Detections()
+        return self.merge(self.backend.detect_batch(crops, size=self.img_size), placements)
+
+    def crops(self, frame):
+        """The frame's region crops and, per crop, the (origin, region) to map its boxes back"""
+        crops, placements = [], []
+        for region in self.regions:
+            x1, y1, x2, y2 = region.bounds(frame.shape)
+            if x2 > x1 and y2 > y1:
+                crops.append(frame[y1:y2, x1:x2])
+                placements.append(((x1, y1), region))
+        return crops, placements
+
+    def merge(self, results, placements):
+        """Full-frame Detections from the per-crop results of ``crops()``"""
+        parts = []
+        for detections, ((x, y), region) in zip(results, placements):
+            data = detections.data.copy()
+            data[:, [0, 2]] += x
+            data[:, [1, 3]] += y
+            centers = (data[:, :2] + data[:, 2:4]) / 2
+            parts.append(data[region.contains(centers)])
+
+        data = np.concatenate(parts)
+        if len(self.regions) > 1 and len(data) > 1:
+            # Overlapping regions can see the same person twice
+            keep = nms(data[:, :4] + data[:, 5:6] * 4096.0, data[:, 4], self.iou)
+            data = data[keep]
+        return Detections(data)
+
+
+class MultiCameraRoiDetector:
+    """Batched detection for several cameras, each with its own regions and input size
+
+    ``detect_batch(frames, sources)`` crops every frame with its camera's
+    RoiDetector and runs all crops that share an input size through the
+    backend in one call.
+    """
+
+    def __init__(self, backend, detectors):
+        self.backend = backend
+        self.detectors = dict(detectors)
+
+    @classmethod
+    def from_config(cls, backend, config):
+        cameras = (config or {}).get("cameras") or []
+        return cls(backend, {camera["name"]: RoiDetector.from_config(backend, camera_settings(config, camera["name"]))
+                             for camera in cameras})
+
+    @property
+    def startup(self):
+        return self.backend.startup
+
+    def detector(self, source):
+        if source not in self.detectors:
+            self.detectors[source] = RoiDetector(self.backend)
+        return self.detectors[source]
+
+    def detect_batch(self, frames, sources):
+        # Per frame: its detector and (input size, crops, placements), where None placements = whole frame
+        jobs = []
+        for frame, source in zip(frames, sources):
+            detector = self.detector(source)
+            if detector.regions:
+                crops, placements = detector.crops(frame)
+            else:
+                crops, placements = [frame], None
+            jobs.append((detector, crops, placements))
+
+        by_size = {}
+        for index, (detector, crops, _) in enumerate(jobs):
+            for crop in crops:
+                by_size.setdefault(detector.img_size, []).append((index, crop))
+        outputs = [[] for _ in jobs]
+        for size, items in by_size.items():
+            results = self.backend.detect_batch([crop for _, crop in items], size=size)
+            for (index, _), result in zip(items, results):
+                outputs[index].append(result)
+
+        detections = []
+        for (detector, crops, placements), results in zip(jobs, outputs):
+            if placements is None:
+                detections.append(results[0])
+            elif not crops:
+                detections.append(Detections())
+            else:
+                detections.append(detector.merge(results, placements))
+        return detections
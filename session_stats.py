@@ -0,0 +1,108 @@
+"""
+Running statistics for one detection session.
+
+SessionStats is fed by the detection loop (one call per frame) and by
+FanController state changes, and keeps counters and open intervals so
+every update is O(1). ``snapshot()`` answers "stats so far" at any moment
+without reading the log; ``finish()`` writes the session summary.
+"""
+
+import threading
+import time
+
+
+class SessionStats:
+    """Counters and durations for one session, updated incrementally"""
+
+    def __init__(self, fan_power_w=50.0, now=None):
+        self.fan_power_w = fan_power_w
+        self.started = time.time() if now is None else now
+        self.ended = None
+        self.frames = 0
+        self.person_frames = 0
+        self.occupancy_changes = 0
+        self.fan_switches = 0
+        self.occupied_seconds = 0.0
+        self.fan_on_seconds = 0.0
+        self._occupied_since = None
+        self._fan_on_since = None
+        self._occupied = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        settings = (config or {}).get("stats") or {}
+        return cls(settings.get("fan_power_watts", 50.0))
+
+    def attach(self, fan):
+        """Follow ``fan``'s on/off transitions (no-op without a fan controller)"""
+        if fan is not None:
+            if fan.fan_on:
+                self.on_fan_change(True)
+            fan.add_listener(self.on_fan_change)
+        return self
+
+    def record_frame(self, occupied, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.frames += 1
+            if occupied:
+                self.person_frames += 1
+            if occupied == self._occupied:
+                return
+            if self._occupied is not None:
+                self.occupancy_changes += 1
+            if occupied:
+                self._occupied_since = now
+            elif self._occupied_since is not None:
+                self.occupied_seconds += now - self._occupied_since
+                self._occupied_since = None
+            self._occupied = occupied
+
+    def on_fan_change(self, on, now=None):
+        """FanController listener"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if on and self._fan_on_since is None:
+                self.fan_switches += 1
+                self._fan_on_since = now
+            elif not on and self._fan_on_since is not None:
+                self.fan_on_seconds += now - self._fan_on_since
+                self._fan_on_since = None
+
+    def snapshot(self, now=None):
+        """Totals so far, counting intervals that are still open up to ``now``"""
+        with self._lock:
+            now = self.ended or (time.time() if now is None else now)
+            duration = max(now - self.started, 0.0)
+            occupied = self.occupied_seconds + (now - self._occupied_since if self._occupied_since else 0.0)
+            fan_on = self.fan_on_seconds + (now - self._fan_on_since if self._fan_on_since else 0.0)
+            return {
+                "duration_s": duration,
+                "frames": self.frames,
+                "person_frames": self.person_frames,
+                "occupancy_changes": self.occupancy_changes,
+                "occupied_s": occupied,
+                "fan_switches": self.fan_switches,
+                "fan_on_s": fan_on,
+                "energy_used_kwh": self.fan_power_w * fan_on / 3.6e6,
+                # Against a fan left running for the whole session
+                "energy_saved_kwh": self.fan_power_w * (duration - fan_on) / 3.6e6,
+            }
+
+    def format_stats(self, now=None):
+        stats = self.snapshot(now)
+        duration = stats["duration_s"] or 1.0
+        return (f"{stats['duration_s'] / 60:.1f} min, {stats['frames']:,} frames, "
+                f"{stats['person_frames']:,} with a person, occupied {100 * stats['occupied_s'] / duration:.0f}%, "
+                f"fan on {stats['fan_on_s'] / 60:.1f} min ({stats['fan_switches']} switch-ons), "
+                f"~{stats['energy_saved_kwh']:.3f} kWh saved")
+
+    def finish(self, logger, now=None):
+        """Close the session and write its summary to ``logger``; returns the final snapshot"""
+        if self.ended is None:
+            self.ended = time.time() if now is None else now
+        stats = self.snapshot()
+        logger.log_event("STATS", self.format_stats())
+        logger.log_summary(stats["person_frames"], round(stats["fan_on_s"] / 60, 1), stats["energy_saved_kwh"])
+        return stats
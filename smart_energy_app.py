@@ -455,11 +455,13 @@ class OccupancyDetector:
     
     def __init__(self):
         self.model_loaded = False
+        self.service = None
         self.load_model()
     
     def load_model(self):
         """Load or initialize the occupancy detection model"""
         try:
+            self.connect_service()
             # Simulate model loading
             self.model_loaded = True
             st.success("✅ Occupancy Detection Model Loaded")
@@ -467,7 +469,18 @@ class OccupancyDetector:
             st.error(f"❌ Model loading failed: {e}")
             self.model_loaded = False
     
-    def detect_occupancy(self, image_data=None) -> Tuple[bool, float, int]:
+    def connect_service(self):
+        """Subscribe to occupancy events from the shared detection service, if enabled"""
+        try:
+            from utils import load_config
+            from detection_service import DetectionClient, service_address
+            config = load_config("config.yaml") or {}
+        except (ImportError, OSError):
+            return
+        if (config.get("service") or {}).get("enabled", False):
+            self.service = DetectionClient(service_address(config), topics=["occupancy"]).start()
+    
+    def detect_occupancy(self, image_data=None, room_id=None) -> Tuple[bool, float, int]:
         """
         Detect occupancy in the given image
         Returns: (is_occupied, confidence, person_count)
@@ -475,6 +488,11 @@ class OccupancyDetector:
         if not self.model_loaded:
             return False, 0.0, 0
         
+        # Live result from the detection service for rooms that have a camera
+        if self.service is not None and room_id in self.service.occupancy:
+            state = self.service.occupancy[room_id]
+            return state["occupied"], state["confidence"], state["person_count"]
+        
         # Simulate ML detection with some randomness
         confidence = random.uniform(0.7, 0.95)
         person_count = random.randint(0, 3)
@@ -1003,7 +1021,7 @@ def show_dashboard():
     
     # Update occupancy for all rooms (simulate real-time detection)
     for room_id, room in st.session_state.energy_monitor.rooms.items():
-        is_occupied, confidence, person_count = st.session_state.occupancy_detector.detect_occupancy()
+        is_occupied, confidence, person_count = st.session_state.occupancy_detector.detect_occupancy(room_id=room_id)
         st.session_state.energy_monitor.update_room_occupancy(room_id, is_occupied, confidence, person_count)
     
     # Calculate energy savings
@@ -0,0 +1,457 @@
+"""
+Broadcast hub for the MJPEG video feed.
+
+One producer thread captures, detects, renders and JPEG-encodes each frame
+exactly once and publishes it into a versioned latest-frame slot. Every
+viewer just waits for a version newer than the one it sent last, so N
+viewers cost one inference per frame, and a slow viewer skips frames
+instead of holding everyone else back.
+"""
+
+import threading
+import time
+
+
+class FrameSlot:
+    """Holds the most recent item and a version counter viewers can wait on"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.version = 0
+        self.value = None
+
+    def publish(self, value):
+        with self._cond:
+            self.version += 1
+            self.value = value
+            self._cond.notify_all()
+
+    def latest(self):
+        with self._cond:
+            return self.version, self.value
+
+    def wait(self, after=0, timeout=1.0):
+        """(version, value) once something newer than ``after`` is published, else None"""
+        with self._cond:
+            if self.version == after:
+                self._cond.wait(timeout)
+            if self.version == after or self.value is None:
+                return None
+            return self.version, self.value
+
+
+class StreamFrame:
+    """One published frame: the encoded JPEG plus what it was rendered from"""
+
+    __slots__ = ("jpeg", "image", "detections", "occupancy", "timestamp", "encoded", "lock")
+
+    def __init__(self, jpeg, image=None, detections=None, timestamp=None, occupancy=None):
+        self.jpeg = jpeg
+        self.image = image
+        self.detections = detections
+        self.occupancy = occupancy  # state dict when there are no Detections (relayed frames)
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.encoded = {}  # tier name -> JPEG bytes, filled by TierEncoder
+        self.lock = threading.Lock()
+
+
+class LocalProducer:
+    """Reads the camera and runs detection in this process"""
+
+    def __init__(self, camera, detector, jpeg_quality=80, release=None):
+        from overlay import OverlayRenderer
+
+        self.camera = camera
+        self.detector = detector
+        self.jpeg_quality = jpeg_quality
+        self.release = release  # called on close to drop the shared model
+        self.renderer = OverlayRenderer()
+
+    def __call__(self):
+        import cv2
+
+        success, frame = self.camera.read()
+        if not success:
+            return None
+        detections = self.detector(frame)
+        # Each captured frame is new and published as is, so draw on it directly
+        image = self.renderer.render(frame, detections, in_place=True)
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return None
+        return StreamFrame(buffer.tobytes(), image, detections)
+
+    def close(self):
+        self.camera.release()
+        self.detector = None
+        if self.release is not None:
+            self.release()
+
+
+class ServiceProducer:
+    """Relays already-encoded frames from the shared detection service"""
+
+    def __init__(self, client, camera=None):
+        self.client = client
+        self.camera = camera
+        self.seq = 0
+
+    def __call__(self):
+        latest = self.client.wait_frame(self.camera, self.seq, timeout=1.0)
+        if latest is None:
+            return False  # nothing new yet, try again
+        self.seq, jpeg = latest
+        occupancy = self.client.occupancy
+        state = occupancy.get(self.camera) if self.camera else next(iter(list(occupancy.values())), None)
+        return StreamFrame(jpeg, occupancy=state)
+
+    def close(self):
+        self.client.close()
+
+
+class StreamHub:
+    """Runs one producer on a background thread and broadcasts its frames"""
+
+    def __init__(self, producer):
+        self.producer = producer
+        self.slot = FrameSlot()
+        self.frames = 0
+        self.viewers = 0
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stream-hub", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set() and self._produce():
+            pass
+
+    def _produce(self):
+        """Run the producer once and publish its frame; False when the source has ended"""
+        item = self.producer()
+        if item is None:
+            return False
+        if item is not False:
+            self.frames += 1
+            self.slot.publish(item)
+            for listener in self.listeners:
+                listener(self.slot.version, item)
+        return True
+
+    def add_listener(self, callback):
+        """Call ``callback(version, frame)`` on the producer thread for every published frame"""
+        self.listeners.append(callback)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self.producer.close()
+
+    def subscribe(self, timeout=1.0):
+        """Yield each new StreamFrame; frames published while the viewer is busy are skipped"""
+        self.join()
+        try:
+            version = 0
+            while not self._stop.is_set():
+                item = self.slot.wait(version, timeout)
+                if item is None:
+                    if not self.keep_waiting():
+                        break
+                    continue
+                version, frame = item
+                yield frame
+        finally:
+            self.leave()
+
+    def join(self):
+        """Register a viewer; subscribe() does this, other front ends call it directly"""
+        with self._lock:
+            self.viewers += 1
+
+    def leave(self):
+        with self._lock:
+            self.viewers -= 1
+
+    def touch(self):
+        """Mark the hub as in use without subscribing (a lazy hub starts and stays up for a while)"""
+        self.join()
+        self.leave()
+
+    def keep_waiting(self):
+        """Whether a viewer that got no frame within its timeout should keep waiting"""
+        return self.running
+
+    def status(self):
+        return {"state": "running" if self.running else "stopped", "viewers": self.viewers,
+                "frames_produced": self.frames}
+
+
+class LazyStreamHub(StreamHub):
+    """StreamHub that creates its producer for the first viewer and releases it when idle
+
+    Nothing is opened or loaded until someone subscribes; once the last viewer
+    has been gone for ``idle_timeout`` seconds the producer is closed (camera
+    released, model evicted from the process-wide backend caches) and the hub
+    goes back to ``idle``.
+    """
+
+    def __init__(self, factory, idle_timeout=30.0):
+        super().__init__(None)
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.state = "idle"
+        self.error = None
+        self.started_at = None
+        self.idle_since = time.time()
+        self._closed = False
+
+    def _run(self):
+        self.state = "starting"
+        self.started_at = time.time()
+        try:
+            self.producer = self.factory()
+        except Exception as e:
+            self.state, self.error = "error", str(e)
+            print(f"❌ Stream producer failed to start: {e}")
+            return
+        self.state, self.error = "running", None
+        try:
+            while not self._stop.is_set() and not self._expired():
+                if not self._produce():
+                    self.error = "source ended"
+                    break
+        except Exception as e:
+            self.error = str(e)
+            print(f"❌ Stream producer stopped: {e}")
+        finally:
+            self.state = "stopping"
+            self.producer.close()
+            self.producer = None
+            self.state = "idle" if self.error is None else "error"
+
+    def _expired(self):
+        with self._lock:
+            return self.viewers == 0 and time.time() - self.idle_since > self.idle_timeout
+
+    def join(self):
+        super().join()
+        # A new viewer also retries after an error
+        with self._lock:
+            self.start()
+
+    def leave(self):
+        with self._lock:
+            self.viewers -= 1
+            if self.viewers == 0:
+                self.idle_since = time.time()
+
+    def keep_waiting(self):
+        # (Re)start for a viewer that arrived while the producer was shutting down
+        if self._closed or self.state == "error":
+            return False
+        with self._lock:
+            self.start()
+        return True
+
+    def start(self):
+        if not self._closed:
+            super().start()
+        return self
+
+    def stop(self):
+        self._closed = True
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    @property
+    def ready(self):
+        """True when a viewer can be served: running, or able to start on demand"""
+        return not self._closed and self.state in ("idle", "starting", "running")
+
+    def status(self):
+        with self._lock:
+            viewers = self.viewers
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "viewers": viewers,
+            "frames_produced": self.frames,
+            "idle_timeout": self.idle_timeout,
+            "idle_for": time.time() - self.idle_since if viewers == 0 else 0.0,
+            "uptime": time.time() - self.started_at if self.state == "running" else 0.0,
+            "error": self.error,
+        }
+
+
+def create_producer(config):
+    """Producer for the configured setup: the shared detection service or a local camera + model"""
+    if (config.get("service") or {}).get("enabled", False):
+        # Thin consumer: the detection service owns the camera and the model
+        from detection_service import DetectionClient, service_address
+        client = DetectionClient(service_address(config), topics=["frames"]).start()
+        print(f"📡 Using detection service at {client.address}")
+        return ServiceProducer(client)
+
+    from backends import get_backend, release_backend
+    from camera import open_source
+    from roi import RoiDetector, camera_settings
+    settings = camera_settings(config)
+    camera = open_source(settings.get("source", 0))
+    detector = RoiDetector.from_config(get_backend(config), settings)
+    print(f"✅ {detector.startup}")
+    return LocalProducer(camera, detector, (config.get("flask") or {}).get("jpeg_quality", 80),
+                         release=lambda: release_backend(config))
+
+
+DEFAULT_TIERS = {
+    "full": {"width": 0, "quality": 0, "fps": 0},      # the producer's own encoding, as fast as it comes
+    "medium": {"width": 640, "quality": 70, "fps": 15},
+    "low": {"width": 320, "quality": 50, "fps": 5},
+}
+
+
+class QualityTier:
+    """One stream variant; width/quality 0 mean the source size / the producer's encoding"""
+
+    __slots__ = ("name", "width", "quality", "fps")
+
+    def __init__(self, name, width=0, quality=0, fps=0):
+        self.name = name
+        self.width = int(width or 0)
+        self.quality = int(quality or 0)
+        self.fps = float(fps or 0)
+
+    @property
+    def reencode(self):
+        return bool(self.width or self.quality)
+
+
+class TierEncoder:
+    """Encodes each published frame at most once per quality tier, shared by every viewer on it"""
+
+    def __init__(self, tiers=None):
+        self.tiers = [QualityTier(name, **spec) for name, spec in (tiers or DEFAULT_TIERS).items()]
+        self.by_name = {tier.name: tier for tier in self.tiers}
+        self.stats = {tier.name: {"viewers": 0, "frames": 0, "bytes": 0, "encodes": 0} for tier in self.tiers}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls((config.get("flask") or {}).get("tiers"))
+
+    def select(self, tier=None, width=None, quality=None, fps=None):
+        """Tier for the request parameters: by name, else the best tier within the given limits"""
+        if tier:
+            if tier not in self.by_name:
+                raise ValueError(f"unknown tier '{tier}' (choose from {', '.join(self.by_name)})")
+            return self.by_name[tier]
+
+        def fits(candidate):
+            return ((not width or (candidate.width and candidate.width <= width))
+                    and (not quality or (candidate.quality and candidate.quality <= quality))
+                    and (not fps or (candidate.fps and candidate.fps <= fps)))
+
+        # Tiers are listed best first; fall back to the cheapest one
+        return next((candidate for candidate in self.tiers if fits(candidate)), self.tiers[-1])
+
+    def encode(self, frame, tier):
+        """JPEG bytes of ``frame`` for ``tier``, encoded by the first viewer that needs it"""
+        if not tier.reencode:
+            return frame.jpeg
+        with frame.lock:
+            data = frame.encoded.get(tier.name)
+            if data is None:
+                data = frame.encoded[tier.name] = self._encode(frame, tier)
+                self.stats[tier.name]["encodes"] += 1
+        return data
+
+    def _encode(self, frame, tier):
+        import cv2
+        import numpy as np
+
+        if frame.image is None:
+            # Relayed frames only carry the JPEG; decode once and keep it for the other tiers
+            frame.image = cv2.imdecode(np.frombuffer(frame.jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        image = frame.image
+        height, width = image.shape[:2]
+        if tier.width and width > tier.width:
+            image = cv2.resize(image, (tier.width, max(1, round(height * tier.width / width))),
+                               interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, tier.quality or 80])
+        return buffer.tobytes() if ok else frame.jpeg
+
+    def add_viewer(self, tier, delta=1):
+        with self._lock:
+            self.stats[tier.name]["viewers"] += delta
+
+    def record(self, tier, size):
+        with self._lock:
+            stats = self.stats[tier.name]
+            stats["frames"] += 1
+            stats["bytes"] += size
+
+    def stream(self, hub, tier, timeout=1.0):
+        """Yield JPEG bytes from ``hub`` for one viewer on ``tier``, at most ``tier.fps`` per second"""
+        interval = 1.0 / tier.fps if tier.fps else 0.0
+        next_due = 0.0
+        self.add_viewer(tier)
+        try:
+            for frame in hub.subscribe(timeout):
+                if interval:
+                    now = time.monotonic()
+                    if now < next_due:
+                        continue
+                    next_due = max(next_due + interval, now)
+                data = self.encode(frame, tier)
+                self.record(tier, len(data))
+                yield data
+        finally:
+            self.add_viewer(tier, -1)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.stats.items()}
+
+
+class SnapshotCache:
+    """Latest published frame for polling clients, with validators for conditional GET
+
+    Only reads what the hub already produced; it never captures or runs detection.
+    """
+
+    def __init__(self, hub, thumbnail_width=320, thumbnail_quality=70):
+        self.hub = hub
+        self.encoder = TierEncoder({"snapshot": {}, "thumbnail": {"width": thumbnail_width,
+                                                                 "quality": thumbnail_quality}})
+        self.boot = f"{int(time.time()):x}"  # keeps ETags unique across restarts
+
+    @classmethod
+    def from_config(cls, hub, config):
+        settings = (config.get("flask") or {}).get("snapshot") or {}
+        return cls(hub, settings.get("thumbnail_width", 320), settings.get("thumbnail_quality", 70))
+
+    def latest(self, thumbnail=False):
+        """(etag, frame) of the newest frame, or None before the first one"""
+        version, frame = self.hub.slot.latest()
+        if frame is None:
+            return None
+        return f"{self.boot}-{version}{'-t' if thumbnail else ''}", frame
+
+    def jpeg(self, frame, thumbnail=False):
+        tier = self.encoder.by_name["thumbnail" if thumbnail else "snapshot"]
+        data = self.encoder.encode(frame, tier)
+        self.encoder.record(tier, len(data))
+        return data
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the array-based detection results
+"""
+
+import numpy as np
+
+from detections import Detections
+
+
+def make_data():
+    return np.array([
+        [10, 10, 50, 80, 0.90, 0],   # person
+        [60, 20, 90, 70, 0.30, 0],   # person, low confidence
+        [5, 5, 20, 20, 0.95, 56],    # chair
+    ], dtype=np.float32)
+
+
+def test_person_count_and_confidence():
+    detections = Detections(make_data())
+    assert detections.has_person()
+    assert detections.person_count() == 2
+    assert detections.person_count(min_confidence=0.5) == 1
+    assert abs(detections.max_confidence() - 0.90) < 1e-6
+
+
+def test_filter_and_empty():
+    detections = Detections(make_data()).filter(classes=[56])
+    assert len(detections) == 1 and detections.class_ids.tolist() == [56]
+    assert not detections.has_person()
+    assert Detections().max_confidence() == 0.0
+
+
+def test_motion_gate_skips_static_frames():
+    from motion_gate import GatedDetector, MotionGate
+
+    calls = []
+    detector = GatedDetector(lambda frame: calls.append(1) or len(calls),
+                             MotionGate(refresh_interval=0))
+    static = np.full((120, 160, 3), 40, dtype=np.uint8)
+    moved = static.copy()
+    moved[20:80, 30:90] = 255
+
+    results = [detector(static) for _ in range(10)] + [detector(moved)]
+    assert len(calls) == 2
+    assert results[-2] == 1 and results[-1] == 2
+    assert detector.stats()["skipped"] == 9
+
+
+def test_roi_detector_maps_boxes_to_full_frame():
+    from roi import Region, RoiDetector
+
+    class FakeBackend:
+        name = "fake"
+
+        def detect_batch(self, frames, size=None):
+            # One person in the top-left corner of every crop
+            return [Detections([[0, 0, 10, 20, 0.9, 0]]) for _ in frames]
+
+    regions = [Region("desk", rect=(100, 50, 200, 100)),
+               Region("door", polygon=[[400, 0], [600, 0], [600, 300], [400, 300]])]
+    detector = RoiDetector(FakeBackend(), regions)
+    detections = detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+
+    assert sorted(detections.boxes.tolist()) == [[100, 50, 110, 70], [400, 0, 410, 20]]
+    assert Region("tri", polygon=[[0, 0], [10, 0], [0, 10]]).contains(
+        np.array([[2, 2], [9, 9]], dtype=np.float32)).tolist() == [True, False]
+
+
+def test_occupancy_tracker_records_changes_only():
+    from occupancy_feed import OccupancyTracker
+
+    tracker = OccupancyTracker(history_size=10)
+    tracker.update({"occupied": False, "person_count": 0, "confidence": 0.0}, timestamp=1.0)
+    tracker.update({"occupied": True, "person_count": 1, "confidence": 0.8}, timestamp=2.0)
+    tracker.update({"occupied": True, "person_count": 1, "confidence": 0.9}, timestamp=3.0)
+
+    assert tracker.version == 2
+    assert tracker.current()["confidence"] == 0.9 and tracker.current()["since"] == 2.0
+    assert [change["ts"] for change in tracker.history()] == [1.0, 2.0]
+    assert tracker.history(since=1.5) == [tracker.history()[-1]]
+    assert tracker.wait_change(2, timeout=0.01) is None
+    assert tracker.wait_change(1, timeout=0.01)[0] == 2
+
+
+def test_overlay_renderer_reuses_its_buffer():
+    from overlay import OverlayRenderer
+
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    detections = Detections(np.array([[10, 20, 60, 90, 0.9, 0]], dtype=np.float32))
+    renderer = OverlayRenderer()
+
+    first = renderer.render(frame, detections, banner="Temp")
+    second = renderer.render(frame, detections)
+    assert first is second and renderer.allocations == 1
+    assert not frame.any() and second[20, 30].any()
+
+    assert renderer.render(frame, detections, in_place=True) is frame
+    assert frame[20, 30].any()
+
+
+def test_multi_camera_detector_crops_each_camera_with_its_own_rois():
+    from roi import MultiCameraRoiDetector, RoiDetector
+
+    class RecordingBackend:
+        name = "recording"
+        startup = ""
+
+        def __init__(self):
+            self.calls = []
+
+        def detect_batch(self, frames, size=None):
+            self.calls.append((size, [frame.shape[:2] for frame in frames]))
+            return [Detections([[0, 0, 10, 20, 0.9, 0]]) for _ in frames]
+
+    backend = RecordingBackend()
+    config = {"cameras": [
+        {"name": "desk", "img_size": 320, "rois": [{"name": "desk", "rect": [100, 50, 200, 100]}]},
+        {"name": "door", "img_size": 640, "rois": [{"name": "door", "rect": [400, 0, 80, 300]}]},
+        {"name": "hall"},
+    ]}
+    detector = MultiCameraRoiDetector.from_config(backend, config)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    desk, door, hall = detector.detect_batch([frame, frame, frame], ["desk", "door", "hall"])
+
+    assert sorted(backend.calls, key=str) == sorted([(320, [(100, 200)]), (640, [(300, 80)]),
+                                                     (None, [(480, 640)])], key=str)
+    assert desk.boxes.tolist() == [[100, 50, 110, 70]]
+    assert door.boxes.tolist() == [[400, 0, 410, 20]]
+    assert hall.boxes.tolist() == [[0, 0, 10, 20]]
+    assert isinstance(detector.detector("desk"), RoiDetector)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the fan controller, its off-delay scheduler and the GPIO actuator bank
+"""
+
+import time
+
+
+def test_fan_scheduler_switches_fans_off_without_the_loop():
+    from actuator_bank import ActuatorBank, SimulatedGPIO
+    from fan_controller import FanController
+    from fan_scheduler import FanScheduler
+
+    bank = ActuatorBank(SimulatedGPIO())
+    scheduler = FanScheduler()
+    fans = [scheduler.add(FanController(pin, off_delay=0.05 if pin % 2 else 0.3, bank=bank)) for pin in range(200)]
+    for fan in fans:
+        fan.turn_on()
+        fan.update_last_seen()
+    assert scheduler.pending() == 200
+
+    # Nobody calls turn_off(); keep one fan busy by "seeing" it
+    busy = fans[1]
+    deadline = time.time() + 0.2
+    while time.time() < deadline:
+        busy.update_last_seen()
+        time.sleep(0.01)
+    assert busy.fan_on
+    assert not any(fan.fan_on for fan in fans[3::2])
+    assert all(fan.fan_on for fan in fans[0::2])
+
+    time.sleep(0.25)
+    assert not any(fan.fan_on for fan in fans)
+    assert scheduler.pending() == 0 and scheduler.switched_off == 200
+    scheduler.close()
+
+    fan = FanController(5, off_delay=10, bank=bank)
+    fan.turn_on()
+    fan.update_last_seen()
+    assert not fan.switch_off_if_idle(now=fan.last_seen + 5)
+    assert fan.switch_off_if_idle(now=fan.last_seen + 11) and not fan.fan_on
+
+def test_actuator_bank_sets_up_once_and_coalesces_writes():
+    from actuator_bank import ActuatorBank, SimulatedGPIO
+    from fan_controller import FanController
+
+    gpio = SimulatedGPIO()
+    bank = ActuatorBank(gpio, interval=None)
+    fans = [FanController(pin, bank=bank) for pin in (17, 18, 27)]
+    FanController(17, bank=bank)
+    assert gpio.setups == 3 and gpio.mode == gpio.BCM
+
+    for fan in fans:
+        fan.turn_on()
+    fans[2].switch_off()  # on and off again before the tick: nothing to write for pin 27
+    assert gpio.calls == 0
+    assert sorted(bank.apply()) == [17, 18]
+    assert gpio.calls == 1 and gpio.writes == 2
+    assert gpio.pins == {17: gpio.HIGH, 18: gpio.HIGH, 27: gpio.LOW}
+
+    bank.set(17, True)
+    assert bank.apply() == [] and gpio.calls == 1
+    assert bank.coalesced == 3  # pin 27 on + off, pin 17 already on
+
+    through = ActuatorBank(SimulatedGPIO(), interval=0)
+    fan = FanController(4, bank=through)
+    fan.turn_on()
+    assert through.gpio.pins[4] == through.gpio.HIGH and through.gpio.calls == 1
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Tests for DetectionLogger and the log tooling
+"""
+
+import time
+
+from main import DetectionLogger
+
+
+def read_events(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.startswith("[")]
+
+
+def test_async_logger_writes_everything_in_order_on_close(tmp_path):
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, async_write=True, flush_interval=60, flush_size=1000, echo=False)
+    for i in range(500):
+        logger.log_event("IDLE", f"event {i}", "OFF")
+    logger.log_summary(3, 1.5, 0.25)
+    logger.log_event("SYSTEM", "after summary")
+    logger.close()
+
+    events = read_events(path)
+    assert len(events) == 501
+    assert events[0].endswith("IDLE: event 0 → Fan: OFF")
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert text.index("event 499") < text.index("SESSION SUMMARY") < text.index("after summary")
+
+
+def test_transition_mode_logs_changes_and_exact_run_lengths(tmp_path):
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, echo=False, mode="transitions")
+    for _ in range(1532):
+        logger.log_state("IDLE", "No human detected", "OFF")
+    for i in range(3):
+        logger.log_state("DETECTION", f"Human detected (#{i + 1})", "ON")
+    logger.log_state("IDLE", "No human detected", "OFF")
+    logger.log_event("SYSTEM", "unrelated events don't end a run")
+    logger.log_state("IDLE", "No human detected", "OFF")
+    logger.close()
+
+    events = [line.split("] ", 1)[1] for line in read_events(path)]
+    assert events[0] == "IDLE: No human detected → Fan: OFF"
+    assert events[1].startswith("RUN: IDLE x 1,532 frames over 0s")
+    assert events[2] == "DETECTION: Human detected (#1) → Fan: ON"
+    assert events[3].startswith("RUN: DETECTION x 3 frames")
+    assert events[4] == "IDLE: No human detected → Fan: OFF"
+    assert events[5] == "SYSTEM: unrelated events don't end a run"
+    assert events[6].startswith("RUN: IDLE x 2 frames")
+    assert len(events) == 7
+
+
+def test_event_store_queries_and_exports_typed_events(tmp_path):
+    import io
+    from event_store import EventStore
+
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, async_write=True, echo=False, store=str(tmp_path / "events.db"), room="lab")
+    logger.log_event("DETECTION", "Human detected (#1)", "ON", count=1, temperature=28.5)
+    logger.log_event("IDLE", "No human detected", "OFF", room="study")
+    logger.log_event("SYSTEM", "Started")
+    logger.flush()
+    store = logger.store
+
+    detection = store.query(types="DETECTION")[0]
+    assert (detection.room, detection.fan, detection.count, detection.temperature) == ("lab", "ON", 1, 28.5)
+    assert [e.type for e in store.query(room="study")] == ["IDLE"]
+    assert [e.type for e in store.tail(2)] == ["IDLE", "SYSTEM"]
+    assert store.query(since=detection.ts + 3600) == []
+    assert store.counts() == {"DETECTION": 1, "IDLE": 1, "SYSTEM": 1}
+
+    out = io.StringIO()
+    assert store.export(out, batch=2) == 3
+    assert out.getvalue().splitlines() == read_events(path)
+    logger.close()
+    assert EventStore(str(tmp_path / "events.db")).counts()["IDLE"] == 1
+
+
+def test_sync_logger_keeps_the_text_log_when_the_store_fails(tmp_path):
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, echo=False, store=str(tmp_path / "events.db"))
+    logger.store._db.close()
+    logger.log_event("DETECTION", "Human detected (#1)", "ON")
+    assert read_events(path)[-1].endswith("DETECTION: Human detected (#1) → Fan: ON")
+
+
+def test_rotation_compresses_segments_and_reader_spans_them(tmp_path):
+    import os
+    import time
+    from log_rotation import LogRotator, iter_events, segments
+
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, echo=False, rotation={"max_mb": 0.002, "retention_days": 0})
+    for i in range(100):
+        logger.log_event("DETECTION" if i % 2 else "IDLE", f"event {i:03d}", "ON")
+    assert logger.rotator.size == os.path.getsize(path)  # bytes, with the multi-byte "→"
+    logger.close()
+    logger.rotator.maintain()
+
+    rotated = segments(path)
+    assert len(rotated) >= 2 and all(segment.compressed for segment in rotated)
+    assert os.path.getsize(path) <= 2 * 1024
+    events = list(iter_events(path))
+    assert [event.message for event in events] == [f"event {i:03d}" for i in range(100)]
+    assert len(list(iter_events(path, types="IDLE"))) == 50
+    assert list(iter_events(path, since=time.time() + 60)) == []
+
+    LogRotator(path, max_bytes=1, max_segments=1).maintain()
+    assert len(segments(path)) == 1
+
+
+def test_segment_reader_survives_concurrent_compression(tmp_path):
+    import gzip
+    import os
+    import shutil
+    from log_rotation import _open_segment, iter_events, segment_path, segments
+
+    path = str(tmp_path / "detection_log.txt")
+    plain = segment_path(path, 1700000000, 1700000060)
+    with open(plain, "w", encoding="utf-8") as f:
+        f.write("[2023-11-14 22:13:20] IDLE: No human detected → Fan: OFF\n")
+    with open(plain, "rb") as src, gzip.open(plain + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+
+    # Mid-compression both files exist: the finished .gz is the one read
+    assert [segment.compressed for segment in segments(path)] == [True]
+
+    # Listed before compression, opened after the plain file was removed
+    listed = segments(path)[0]._replace(path=plain, compressed=False)
+    os.remove(plain)
+    with _open_segment(listed) as f:
+        assert "IDLE" in f.read()
+    assert [event.type for event in iter_events(path)] == ["IDLE"]
+
+
+def test_tail_reads_backwards_across_blocks_and_filters(tmp_path):
+    from log_tail import tail_lines
+
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, echo=False)
+    for i in range(300):
+        logger.log_event(("DETECTION", "IDLE", "TEMP")[i % 3], f"event {i} 🌡️")
+    logger.log_event("RUN", "IDLE x 12 frames over 3s", "OFF")
+
+    assert tail_lines(path, 3, block_size=64) == read_events(path)[-3:]
+    idle = tail_lines(path, 4, types=["IDLE"], block_size=100)
+    assert [line.split(": ", 1)[1] for line in idle] == [
+        "event 292 🌡️", "event 295 🌡️", "event 298 🌡️", "IDLE x 12 frames over 3s → Fan: OFF"]
+    assert len(tail_lines(path, 10_000)) == 301 + 5  # every event plus the non-blank header lines
+
+
+def test_follow_streams_new_lines_across_rotation(tmp_path):
+    import os
+    import threading
+    from log_tail import follow
+
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, echo=False)
+    logger.log_event("IDLE", "before follow")
+    stop = threading.Event()
+    lines = follow(path, types=["DETECTION"], poll=0.01, stop=stop)
+
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(lines))
+    reader.start()
+    time.sleep(0.1)
+    logger.log_event("DETECTION", "first")
+    logger.log_event("IDLE", "skipped")
+    time.sleep(0.1)
+    os.replace(path, path + ".old")
+    logger.ensure_log_file()
+    logger.log_event("DETECTION", "after rotation")
+    time.sleep(0.2)
+    stop.set()
+    reader.join(timeout=2)
+
+    assert [line.split(": ", 1)[1] for line in received] == ["first", "after rotation"]
+
+
+def test_session_stats_follow_frames_and_fan_and_write_summary(tmp_path):
+    from actuator_bank import ActuatorBank, SimulatedGPIO
+    from fan_controller import FanController
+    from session_stats import SessionStats
+
+    fan = FanController(pin=17, off_delay=0, bank=ActuatorBank(SimulatedGPIO()))
+    stats = SessionStats(fan_power_w=100.0, now=1000.0).attach(fan)
+    for i, occupied in enumerate([False, True, True, True, False, False]):
+        stats.record_frame(occupied, now=1000.0 + i * 10)
+    stats.on_fan_change(True, now=1010.0)
+    stats.on_fan_change(False, now=1040.0)
+
+    so_far = stats.snapshot(now=1060.0)
+    assert so_far["frames"] == 6 and so_far["person_frames"] == 3
+    assert so_far["occupancy_changes"] == 2
+    assert so_far["occupied_s"] == 30.0
+    assert so_far["fan_on_s"] == 30.0 and so_far["fan_switches"] == 1
+    assert abs(so_far["energy_saved_kwh"] - 100.0 * 30 / 3.6e6) < 1e-12
+
+    # Real transitions reach the stats through the controller's listeners
+    fan.turn_on()
+    assert stats.snapshot()["fan_switches"] == 2
+    fan.turn_off()
+    assert stats.snapshot()["fan_switches"] == 2
+
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, echo=False)
+    final = stats.finish(logger)
+    logger.close()
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert final["person_frames"] == 3
+    assert "STATS: " in text
+    assert "SESSION SUMMARY" in text and "Total Detections: 3" in text
+
+
+def test_detection_mode_writes_summary_and_releases_outputs_on_error(tmp_path, monkeypatch):
+    import threading
+
+    import cv2
+    import main
+
+    (tmp_path / "config.yaml").write_text(
+        "gpio_pin: 17\noff_delay: 15\ntemp_threshold: 27\n"
+        "camera: {source: synthetic}\ninference: {backend: stub}\ngpio: {backend: simulated}\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cv2, "imshow", lambda *args: None)
+    monkeypatch.setattr(cv2, "waitKey", lambda delay: -1)
+    monkeypatch.setattr(cv2, "destroyAllWindows", lambda: None)
+    frames = []
+
+    def failing_handler(detections, fan, logger, count):
+        frames.append(detections)
+        if len(frames) == 5:
+            raise RuntimeError("sensor unplugged")
+        return count
+
+    monkeypatch.setattr(main, "handle_human_frame", failing_handler)
+    path = str(tmp_path / "detection_log.txt")
+    logger = DetectionLogger(path, echo=False)
+    main.run_human_detection(logger)
+    logger.close()
+
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert "ERROR: Unexpected error: sensor unplugged" in text
+    assert "STATS: " in text and "SESSION SUMMARY" in text
+    assert not any(thread.name == "fan-scheduler" and thread.is_alive() for thread in threading.enumerate())
+
+    # A failure while the outputs are being set up still stops the scheduler thread
+    from session_stats import SessionStats
+
+    def broken_stats(config):
+        raise RuntimeError("bad stats settings")
+
+    monkeypatch.setattr(SessionStats, "from_config", staticmethod(broken_stats))
+    logger = DetectionLogger(path, echo=False)
+    main.run_human_detection(logger)
+    logger.close()
+    assert read_events(path)[-1].endswith("ERROR: Unexpected error: bad stats settings")
+    assert not any(thread.name == "fan-scheduler" and thread.is_alive() for thread in threading.enumerate())
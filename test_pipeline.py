@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Tests for the threaded frame pipeline and frame sources
+"""
+
+import os
+import threading
+import time
+
+from camera import SyntheticSource, open_source
+from pipeline import DropOldestQueue, FramePipeline
+
+
+def test_drop_oldest_queue_keeps_newest():
+    queue = DropOldestQueue(maxsize=2)
+    for i in range(5):
+        queue.put(i)
+
+    assert queue.dropped == 3
+    assert queue.get(timeout=0) == 3
+    assert queue.get(timeout=0) == 4
+    assert queue.get(timeout=0) is None
+
+
+def test_open_synthetic_source():
+    source = open_source("synthetic:64x48@0")
+    assert isinstance(source, SyntheticSource)
+    ret, frame = source.read()
+    assert ret and frame.shape == (48, 64, 3)
+
+
+def test_pipeline_skips_stale_frames():
+    source = SyntheticSource(64, 48, fps=200, max_frames=60)
+
+    def slow_infer(frame):
+        time.sleep(0.02)
+        return frame.mean()
+
+    pipeline = FramePipeline(source, slow_infer, queue_size=1).start()
+    seen = [packet.frame_id for packet in pipeline]
+    pipeline.stop()
+
+    stats = pipeline.stats()
+    assert seen == sorted(seen)
+    assert len(seen) < 60
+    assert stats["dropped_before_inference"] > 0
+    assert stats["capture"]["frames"] == 60
+    assert stats["frame_age"]["max_ms"] > 0
+
+
+def test_engine_batches_frames_from_many_sources():
+    from detection_engine import BatchedDetectionEngine, MultiCameraRunner
+
+    batch_sizes = []
+
+    def infer_batch(frames):
+        batch_sizes.append(len(frames))
+        time.sleep(0.01)
+        return [frame.shape for frame in frames]
+
+    engine = BatchedDetectionEngine(infer_batch, max_batch=4, max_latency=0.05)
+    sources = {f"cam{i}": SyntheticSource(32, 24, fps=100, max_frames=20) for i in range(4)}
+    runner = MultiCameraRunner(engine, sources).start()
+
+    received = set()
+    deadline = time.time() + 5
+    while (runner.running or len(runner.results)) and time.time() < deadline:
+        item = runner.results.get(timeout=0.1)
+        if item is not None:
+            source_id, _, result = item
+            assert result == (24, 32, 3)
+            received.add(source_id)
+    runner.stop()
+
+    assert received == set(sources)
+    assert max(batch_sizes) > 1
+    assert engine.stats()["frames"] == sum(batch_sizes)
+
+
+def test_governor_spaces_inference_to_cpu_budget():
+    from governor import RateGovernor
+
+    governor = RateGovernor(cpu_share=0.25, max_interval=5.0, boost_seconds=2.0)
+    governor.record(0.1, now=0.0)                 # 100 ms inference at 25% -> every 400 ms
+    assert abs(governor.interval - 0.4) < 1e-9
+    assert not governor.due(now=0.2)
+    assert governor.due(now=0.45)
+
+    governor.notify_occupancy(False, now=0.5)
+    governor.notify_occupancy(True, now=0.5)      # occupancy changed -> boost
+    assert governor.due(now=0.55)
+    assert not governor.boosting(now=3.0)
+
+
+def test_benchmark_runs_detection_loop_headless(tmp_path):
+    import benchmark
+
+    config = {
+        "temp_threshold": 27,
+        "inference": {"backend": "stub", "stub": {"latency_ms": 1, "period": 5}},
+        "pipeline": {"enabled": False},
+    }
+    report = benchmark.run(config, "combined", "synthetic:64x48@0", frames=20,
+                           log_file=str(tmp_path / "log.txt"))
+
+    assert report["frames"] == 20
+    assert report["inferences"] == 20
+    assert report["stages"]["inference"]["p50_ms"] >= 1.0
+    assert set(report["stages"]) == set(benchmark.STAGES)
+    assert report["gpio"]["setups"] == 1
+
+
+def test_stream_hub_shares_one_producer_between_viewers():
+    from stream_hub import StreamFrame, StreamHub
+
+    produced = []
+
+    def producer():
+        if len(produced) >= 50:
+            return None
+        time.sleep(0.002)
+        produced.append(1)
+        return StreamFrame(b"jpeg%d" % len(produced))
+    producer.close = lambda: None
+
+    hub = StreamHub(producer)
+    received = {"fast": [], "slow": []}
+
+    def viewer(name, delay):
+        for frame in hub.subscribe(timeout=0.1):
+            received[name].append(frame)
+            time.sleep(delay)
+
+    threads = [threading.Thread(target=viewer, args=("fast", 0)),
+               threading.Thread(target=viewer, args=("slow", 0.02))]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    hub.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    hub.stop()
+
+    assert len(produced) == 50
+    assert len(received["slow"]) < len(received["fast"]) <= 50
+    assert received["slow"][-1].jpeg == b"jpeg50"
+
+
+def test_lazy_stream_hub_starts_on_demand_and_releases_when_idle():
+    from stream_hub import LazyStreamHub, StreamFrame
+
+    events = []
+
+    def factory():
+        events.append("open")
+
+        def producer():
+            time.sleep(0.005)
+            return StreamFrame(b"jpeg")
+        producer.close = lambda: events.append("close")
+        return producer
+
+    hub = LazyStreamHub(factory, idle_timeout=0.1)
+    assert hub.status()["state"] == "idle" and hub.ready
+    assert events == []
+
+    frames = hub.subscribe(timeout=0.1)
+    assert next(frames).jpeg == b"jpeg"
+    assert hub.status()["state"] == "running"
+    frames.close()
+
+    deadline = time.time() + 2
+    while hub.running and time.time() < deadline:
+        time.sleep(0.02)
+    assert events == ["open", "close"]
+    assert hub.status()["state"] == "idle"
+
+    assert next(hub.subscribe(timeout=0.1)).jpeg == b"jpeg"
+    hub.stop()
+    assert events == ["open", "close", "open", "close"]
+
+
+def test_local_producer_close_evicts_the_shared_backend():
+    import backends
+    from stream_hub import create_producer
+
+    config = {"inference": {"backend": "stub"}, "camera": {"source": "synthetic"}}
+    producer = create_producer(config)
+    assert producer() is not None
+    backend = backends.get_backend(config)
+    assert backend in backends._backends.values()
+    producer.close()
+    assert backend not in backends._backends.values()
+
+
+def test_tier_encoder_encodes_each_tier_once_per_frame():
+    import cv2
+    import numpy as np
+    from stream_hub import StreamFrame, TierEncoder
+
+    tiers = TierEncoder()
+    assert tiers.select().name == "full"
+    assert tiers.select(width=800).name == "medium"
+    assert tiers.select(width=640, fps=5).name == "low"
+    assert tiers.select(tier="low").name == "low"
+
+    image = np.full((480, 1280, 3), 127, dtype=np.uint8)
+    frame = StreamFrame(cv2.imencode(".jpg", image)[1].tobytes(), image)
+    low = tiers.select(tier="low")
+    first = tiers.encode(frame, low)
+    assert tiers.encode(frame, low) is first
+    assert tiers.encode(frame, tiers.select()) is frame.jpeg
+    assert cv2.imdecode(np.frombuffer(first, np.uint8), cv2.IMREAD_COLOR).shape == (120, 320, 3)
+    assert tiers.snapshot()["low"]["encodes"] == 1
+
+
+def test_snapshot_cache_serves_published_frames_only():
+    import cv2
+    import numpy as np
+    from stream_hub import SnapshotCache, StreamFrame, StreamHub
+
+    hub = StreamHub(None)
+    snapshots = SnapshotCache(hub, thumbnail_width=64)
+    assert snapshots.latest() is None
+
+    image = np.zeros((120, 160, 3), dtype=np.uint8)
+    hub.slot.publish(StreamFrame(cv2.imencode(".jpg", image)[1].tobytes(), image))
+    etag, frame = snapshots.latest()
+    assert snapshots.latest(thumbnail=True)[0] == etag + "-t"
+    assert snapshots.jpeg(frame) is frame.jpeg
+    thumb = snapshots.jpeg(frame, thumbnail=True)
+    assert cv2.imdecode(np.frombuffer(thumb, np.uint8), cv2.IMREAD_COLOR).shape == (48, 64, 3)
+
+    hub.slot.publish(StreamFrame(b"newer"))
+    assert snapshots.latest()[0] != etag
+
+
+def test_detection_client_receives_frames_and_occupancy_from_service(tmp_path):
+    import cv2
+    import numpy as np
+    from detection_service import DetectionClient, DetectionService
+    from main import DetectionLogger
+
+    config = {"inference": {"backend": "stub"}, "cameras": [{"name": "study", "source": "synthetic"}]}
+    logger = DetectionLogger(str(tmp_path / "detection_log.txt"), echo=False)
+    service = DetectionService(config, logger, str(tmp_path / "svc.sock")).start()
+    client = DetectionClient(service.address, reconnect=0.1).start()
+    try:
+        latest = client.wait_frame("study", timeout=10.0)
+        assert latest is not None
+        seq, jpeg = latest
+        assert cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR) is not None
+        assert client.wait_frame("study", after=seq, timeout=10.0)[0] > seq
+
+        deadline = time.time() + 5
+        while "study" not in client.occupancy and time.time() < deadline:
+            time.sleep(0.05)
+        state = client.occupancy["study"]
+        assert state["type"] == "occupancy" and isinstance(state["occupied"], bool)
+        assert os.stat(service.address).st_mode & 0o777 == 0o600
+    finally:
+        client.close()
+        service.stop()
+        logger.close()
+
+
+def test_detection_service_replaces_only_a_stale_socket(tmp_path):
+    import socket
+
+    import pytest
+    from detection_service import _remove_stale_socket
+
+    path = str(tmp_path / "svc.sock")
+    live = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    live.bind(path)
+    live.listen()
+    with pytest.raises(RuntimeError):
+        _remove_stale_socket(path)
+    assert os.path.exists(path)
+
+    live.close()  # the file outlives the socket, like after a crash
+    _remove_stale_socket(path)
+    assert not os.path.exists(path)
+
+
+def test_async_broadcast_binds_its_loop_on_first_wait():
+    import asyncio
+
+    from app_asgi import AsyncBroadcast
+
+    broadcast = AsyncBroadcast()
+    broadcast._on_publish(1, "dropped")  # no loop yet, e.g. a server without lifespan support
+
+    async def scenario():
+        waiting = asyncio.ensure_future(broadcast.wait(0, timeout=2.0))
+        await asyncio.sleep(0)
+        threading.Thread(target=broadcast._on_publish, args=(2, "frame")).start()
+        return await waiting
+
+    assert asyncio.run(scenario()) == (2, "frame")
+
+
+def test_asgi_app_streams_a_frame_and_reports_status():
+    import asyncio
+    import json
+
+    from app_asgi import DashboardApp
+
+    app = DashboardApp({"inference": {"backend": "stub"}, "camera": {"source": "synthetic"}})
+
+    def scope(path, query=b""):
+        return {"type": "http", "path": path, "query_string": query, "headers": []}
+
+    async def request(path):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+        await app(scope(path), receive, send)
+        return sent
+
+    async def first_frame():
+        sent, disconnect = [], asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body":
+                disconnect.set()
+        await asyncio.wait_for(app(scope("/video_feed", b"tier=low"), receive, send), 20)
+        return sent
+
+    async def run():
+        startup = asyncio.Queue()
+        await startup.put({"type": "lifespan.startup"})
+        lifespan_sent = []
+
+        async def lifespan_send(message):
+            lifespan_sent.append(message)
+        lifespan = asyncio.create_task(app({"type": "lifespan"}, startup.get, lifespan_send))
+        await asyncio.sleep(0)
+        try:
+            feed = await first_frame()
+            status = await request("/status")
+        finally:
+            await startup.put({"type": "lifespan.shutdown"})
+            await asyncio.wait_for(lifespan, 10)
+        return feed, status, lifespan_sent
+
+    feed, status, lifespan_sent = asyncio.run(run())
+
+    assert feed[0]["status"] == 200
+    assert dict(feed[0]["headers"])[b"content-type"].startswith(b"multipart/x-mixed-replace")
+    chunk = feed[1]["body"]
+    assert chunk.startswith(b"--frame\r\nContent-Type: image/jpeg\r\n") and b"\xff\xd8" in chunk
+
+    assert status[0]["status"] == 200
+    body = json.loads(status[1]["body"])
+    assert body["frames_sent"] == 1 and body["connections"] == 0
+    assert body["tiers"]["low"]["encodes"] >= 1
+    assert [m["type"] for m in lifespan_sent] == ["lifespan.startup.complete", "lifespan.shutdown.complete"]